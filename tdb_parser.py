@@ -4,6 +4,7 @@ EA TDB Save File Parser
 
 Parses Xbox 360 NCAA Football save files (roster + dynasty) that use EA's
 proprietary TDB binary database format wrapped in an MC02 container.
+<file> may also be the console's STFS package (CON) holding the save.
 
 Usage:
     python tdb_parser.py <file>                          List all tables
@@ -11,18 +12,65 @@ Usage:
     python tdb_parser.py <file> <TABLE> -o out.csv       Write to file
     python tdb_parser.py <file> <TABLE> --schema         Show field definitions
     python tdb_parser.py <file> <TABLE> --raw            Use raw field codes
+    python tdb_parser.py <file> <TABLE> --columns A,B --where "A=1 AND B>=2"
+                                                         Project/filter rows
+    python tdb_parser.py <file> [<TABLE>] --cache-dir dir/
+                                                         Reuse parsed headers
     python tdb_parser.py export <file> -o dir/           Export all tables
     python tdb_parser.py sqlite <file> [-o out.db]       Export to SQLite
+    python tdb_parser.py sqlite <file> -o out.db --incremental
+                                                         Re-import changed tables
     python tdb_parser.py diff <file1> <file2> <TABLE>    Compare tables
+    python tdb_parser.py diff <file1> <file2> --all      Compare every table
+    python tdb_parser.py diff <file1> <file2> --summary  Changed tables/records
+    python tdb_parser.py batch <files/dirs/globs> [-j N] [-f csv|sqlite|parquet]
+                               [--merge] [--validate] [-o dir/]
+                                                         Export many files
+    python tdb_parser.py history <store.db> <files/dirs/globs>
+                                                         Append snapshots
+    python tdb_parser.py import <file> <TABLE> changes.csv [-o out]
+                                                         Apply CSV edits
+    python tdb_parser.py update <file> <TABLE> --set "Overall += 3"
+                                [--where "TeamId == 17"] Bulk-update fields
+    python tdb_parser.py validate <files/dirs/globs> [--fix]
+                                                         Check checksums/sizes
+    python tdb_parser.py serve <files/dirs/globs> [--port N | --socket path]
+                               [--watch SECONDS]         JSON query server
 """
 
 import argparse
+import asyncio
 import csv
+import glob
+import hashlib
 import io
+import itertools
+import json
+import marshal
+import mmap
+import operator
 import os
+import re
 import sqlite3
 import struct
 import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+try:
+    import numpy as np
+except ImportError:  # optional: only needed for read_columns()
+    np = None
+
+try:
+    from FIELD_MAPPINGS_INFERRED import FIELD_MAPPINGS
+except ImportError:  # the parser also works as a standalone script
+    FIELD_MAPPINGS = {}
 
 
 # Field type constants
@@ -272,7 +320,7 @@ def decode_field(record_bytes, field):
         # String fields are byte-aligned, extract raw bytes
         byte_offset = bit_offset // 8
         byte_len = bit_width // 8
-        raw = record_bytes[byte_offset : byte_offset + byte_len]
+        raw = bytes(record_bytes[byte_offset : byte_offset + byte_len])
         # Null-terminate
         null_pos = raw.find(b"\x00")
         if null_pos >= 0:
@@ -304,15 +352,351 @@ def decode_field(record_bytes, field):
         return extract_bits(record_bytes, bit_offset, bit_width)
 
 
-def parse_tdb(data, tdb_offset):
-    """Parse a single TDB database at the given offset in data.
+def store_bits(buf, bit_offset, bit_width, value):
+    """Write value into bit_width bits starting at bit_offset of a mutable
+    buffer (MSB-first). The counterpart of extract_bits."""
+    if bit_width == 0:
+        return
+    first = bit_offset // 8
+    last = (bit_offset + bit_width - 1) // 8
+    if last >= len(buf):
+        raise ValueError("Field extends past the end of the data")
+    shift = (last + 1) * 8 - bit_offset - bit_width
+    mask = ((1 << bit_width) - 1) << shift
+    old = int.from_bytes(buf[first : last + 1], "big")
+    new = (old & ~mask) | ((value << shift) & mask)
+    buf[first : last + 1] = new.to_bytes(last - first + 1, "big")
+
+
+def field_payload(field, value):
+    """Check that value fits a field and convert it to what gets stored.
+
+    Takes values as decode_field returns them (str for strings, a hex
+    string or bytes for binary fields, int or float for numbers). Returns
+    bytes for string/binary fields and the raw unsigned bits as an int for
+    everything else. Raises ValueError if the value doesn't fit.
+    """
+    ftype = field["type"]
+    name = field["name"]
+    bits = field["bits"]
+
+    if ftype == FIELD_STRING:
+        if not isinstance(value, str):
+            raise ValueError(f"{name} is a string field; got {value!r}")
+        try:
+            raw = value.encode("ascii")
+        except UnicodeEncodeError:
+            raise ValueError(f"{name}: {value!r} is not ASCII") from None
+        size = bits // 8
+        if len(raw) > size:
+            raise ValueError(f"{name}: {value!r} is longer than {size} bytes")
+        return raw.ljust(size, b"\x00")
+
+    if ftype == FIELD_BINARY:
+        try:
+            raw = bytes.fromhex(value) if isinstance(value, str) else bytes(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} is a binary field; got {value!r}") from None
+        if len(raw) != bits // 8:
+            raise ValueError(f"{name}: expected {bits // 8} bytes, got {len(raw)}")
+        return raw
+
+    if ftype == FIELD_FLOAT and bits == 32:
+        if isinstance(value, (str, bytes)):
+            raise ValueError(f"{name} is numeric; got {value!r}")
+        try:
+            return struct.unpack(">I", struct.pack(">f", value))[0]
+        except (TypeError, OverflowError, struct.error):
+            raise ValueError(f"{name}: {value!r} is not a 32-bit float") from None
+
+    try:
+        value = operator.index(value)
+    except TypeError:
+        raise ValueError(f"{name} is an integer field; got {value!r}") from None
+    if ftype == FIELD_SINT and bits:
+        low, high = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+    else:
+        low, high = 0, (1 << bits) - 1
+    if not low <= value <= high:
+        raise ValueError(f"{name}: {value} is out of range ({low}..{high})")
+    return value & ((1 << bits) - 1)
+
+
+def parse_field_value(field, text):
+    """Convert CSV text to the value type decode_field returns for field."""
+    if field["type"] in (FIELD_STRING, FIELD_BINARY):
+        return text
+    try:
+        if field["type"] == FIELD_FLOAT and field["bits"] == 32:
+            return float(text)
+        return int(text)
+    except ValueError:
+        raise ValueError(f"{field['name']}: {text!r} is not a number") from None
+
+
+def _store_payload(buf, rec_start, field, payload):
+    if isinstance(payload, bytes):
+        start = rec_start + field["bit_offset"] // 8
+        if start + len(payload) > len(buf):
+            raise ValueError("Field extends past the end of the data")
+        buf[start : start + len(payload)] = payload
+    else:
+        store_bits(buf, rec_start * 8 + field["bit_offset"], field["bits"],
+                   payload)
+
+
+def encode_field(record_bytes, field, value):
+    """Encode a field value into a record's raw bytes, in place.
+
+    The counterpart of decode_field; record_bytes must be mutable (a
+    bytearray or a writable memoryview). Raises ValueError (see
+    field_payload) if the value doesn't fit the field.
+    """
+    _store_payload(record_bytes, 0, field, field_payload(field, value))
+
+
+# Widest span (in bytes) read with a single int.from_bytes call. Neighbouring
+# bit-packed fields are grouped into spans up to this size so that one read
+# serves several fields; keeping spans small keeps the shifted ints cheap.
+DECODER_SPAN_BYTES = 4
+
+# Schemas whose compiled decoders are kept; a long-running server sees a
+# new one per table layout, so the least recently used are dropped.
+DECODER_CACHE_SIZE = 256
+
+_DECODER_CACHE = OrderedDict()
+_DECODER_CACHE_LOCK = threading.Lock()
+
+
+def _cache_lookup(cache, key):
+    """Return cache[key] (marking it recently used), or None."""
+    with _DECODER_CACHE_LOCK:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_store(cache, key, value):
+    """Add value to an LRU cache bounded by DECODER_CACHE_SIZE."""
+    with _DECODER_CACHE_LOCK:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > DECODER_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _decode_float32(raw):
+    return struct.unpack(">f", struct.pack(">I", raw))[0]
+
+
+def _decode_string(raw):
+    return bytes(raw).split(b"\x00", 1)[0].decode("ascii", errors="replace")
+
+
+def _schema_key(fields):
+    return tuple((f["name"], f["type"], f["bit_offset"], f["bits"]) for f in fields)
+
+
+def _field_expr(field, word, span_end):
+    """Python source decoding one field.
+
+    String/Binary fields are sliced from ``rec``; numeric fields are taken
+    from ``word``, an int holding the record bytes that end at span_end.
+    """
+    ftype = field["type"]
+    bit_offset = field["bit_offset"]
+    bit_width = field["bits"]
+    if ftype in (FIELD_STRING, FIELD_BINARY):
+        byte_offset = bit_offset // 8
+        byte_end = byte_offset + bit_width // 8
+        raw = f"rec[{byte_offset}:{byte_end}]"
+        if ftype == FIELD_STRING:
+            return f"_decode_string({raw})"
+        return f"{raw}.hex()"
+    if bit_width == 0:
+        return "0"
+    shift = span_end * 8 - bit_offset - bit_width
+    expr = f"({word} >> {shift}) & {(1 << bit_width) - 1}"
+    if ftype == FIELD_SINT:
+        sign = 1 << (bit_width - 1)
+        expr = f"(({expr}) ^ {sign}) - {sign}"
+    elif ftype == FIELD_FLOAT and bit_width == 32:
+        expr = f"_decode_float32({expr})"
+    return expr
+
+
+def _exec_source(lines, **constants):
+    """Compile generated decoder source and return its namespace."""
+    namespace = {
+        "_from_bytes": int.from_bytes,
+        "_decode_float32": _decode_float32,
+        "_decode_string": _decode_string,
+        **constants,
+    }
+    exec("\n".join(lines), namespace)
+    return namespace
+
+
+def compile_record_decoder(fields):
+    """Compile a record decoder for a table schema.
+
+    Returns a function mapping a record's raw bytes to a row dict equal to
+    ``{f["name"]: decode_field(record_bytes, f) for f in fields}``. Numeric
+    fields are grouped into byte spans of up to DECODER_SPAN_BYTES; each span
+    is read with one int.from_bytes call and every field in it is pulled out
+    with a shift and mask. Decoders are cached per schema (the last
+    DECODER_CACHE_SIZE schemas used).
+    """
+    key = _schema_key(fields)
+    decoder = _cache_lookup(_DECODER_CACHE, key)
+    if decoder is not None:
+        return decoder
+
+    numeric = [
+        f for f in fields
+        if f["type"] not in (FIELD_STRING, FIELD_BINARY) and f["bits"] > 0
+    ]
+
+    # Group numeric fields (in bit order) into byte spans
+    spans = []
+    span_of = {}
+    for f in sorted(numeric, key=lambda f: f["bit_offset"]):
+        start = f["bit_offset"] // 8
+        end = (f["bit_offset"] + f["bits"] + 7) // 8
+        if spans and spans[-1][0] <= start and \
+                max(spans[-1][1], end) - spans[-1][0] <= DECODER_SPAN_BYTES:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+        span_of[id(f)] = len(spans) - 1
+    need = max((end for _, end in spans), default=0)
+
+    entries = []
+    for f in fields:
+        idx = span_of.get(id(f))
+        span_end = spans[idx][1] if idx is not None else 0
+        entries.append(f"{f['name']!r}: {_field_expr(f, f'w{idx}', span_end)}")
+
+    # Records cut short by the end of the buffer read as zero bits, exactly
+    # like extract_bits does.
+    lines = [
+        "def decode(rec):",
+        "    num = rec",
+        f"    if len(rec) < {need}:",
+        f"        num = bytes(rec) + bytes({need} - len(rec))",
+    ]
+    for idx, (start, end) in enumerate(spans):
+        lines.append(f"    w{idx} = _from_bytes(num[{start}:{end}], 'big')")
+    lines.append("    return {" + ", ".join(entries) + "}")
+
+    decoder = _exec_source(lines)["decode"]
+    _cache_store(_DECODER_CACHE, key, decoder)
+    return decoder
+
+
+def compile_field_decoders(fields):
+    """Compile one decoder per field.
 
-    Returns a dict with 'tables' mapping table_name -> table_info.
+    Returns a list aligned with fields; each entry maps a record's raw bytes
+    to ``decode_field(record_bytes, field)`` without touching other fields.
+    """
+    lines = []
+    for i, f in enumerate(fields):
+        lines.append(f"def decode_{i}(rec):")
+        if f["type"] not in (FIELD_STRING, FIELD_BINARY) and f["bits"] > 0:
+            start = f["bit_offset"] // 8
+            end = (f["bit_offset"] + f["bits"] + 7) // 8
+            lines.append("    num = rec")
+            lines.append(f"    if len(rec) < {end}:")
+            lines.append(f"        num = bytes(rec) + bytes({end} - len(rec))")
+            lines.append(f"    word = _from_bytes(num[{start}:{end}], 'big')")
+            lines.append(f"    return {_field_expr(f, 'word', end)}")
+        else:
+            lines.append(f"    return {_field_expr(f, None, 0)}")
+    namespace = _exec_source(lines)
+    return [namespace[f"decode_{i}"] for i in range(len(fields))]
+
+
+class RecordSchema:
+    """Per-table field index shared by all Record views of that table."""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.decoders = compile_field_decoders(fields)
+        # Later duplicates win, like the dicts built by read_records
+        self.index = {f["name"]: i for i, f in enumerate(fields)}
+        self.names = list(self.index)
+
+
+_SCHEMA_CACHE = OrderedDict()
+
+
+def record_schema(fields):
+    """Return the (cached) RecordSchema for a field list."""
+    key = _schema_key(fields)
+    schema = _cache_lookup(_SCHEMA_CACHE, key)
+    if schema is None:
+        schema = RecordSchema(fields)
+        _cache_store(_SCHEMA_CACHE, key, schema)
+    return schema
+
+
+_UNSET = object()
+
+
+class Record(Mapping):
+    """Lazy, read-only view of one record.
+
+    Backed by the raw record slice; a field is decoded the first time it is
+    accessed and cached. Behaves like the dict rows from read_records
+    (iteration, get(), items(), equality).
+    """
+
+    __slots__ = ("_raw", "_schema", "_values")
+
+    def __init__(self, raw, schema):
+        self._raw = raw
+        self._schema = schema
+        self._values = [_UNSET] * len(schema.fields)
+
+    def __getitem__(self, name):
+        i = self._schema.index[name]
+        value = self._values[i]
+        if value is _UNSET:
+            value = self._schema.decoders[i](self._raw)
+            self._values[i] = value
+        return value
+
+    def __contains__(self, name):
+        return name in self._schema.index
+
+    def __iter__(self):
+        return iter(self._schema.names)
+
+    def __len__(self):
+        return len(self._schema.names)
+
+    def __repr__(self):
+        return f"Record({dict(self)!r})"
+
+    @property
+    def raw(self):
+        """The record's raw bytes."""
+        return self._raw
+
+
+def read_toc(data, tdb_offset):
+    """Read a TDB header and its table of contents without parsing tables.
+
+    Returns a dict with 'toc' mapping table_name -> absolute table offset.
     """
     # TDB header (24 bytes)
     magic = data[tdb_offset : tdb_offset + 2]
     if magic != b"DB":
-        raise ValueError(f"Invalid TDB magic at 0x{tdb_offset:X}: {magic!r}")
+        raise ValueError(
+            f"Invalid TDB magic at 0x{tdb_offset:X}: {bytes(magic)!r}"
+        )
 
     version = struct.unpack(">H", data[tdb_offset + 2 : tdb_offset + 4])[0]
     db_size = struct.unpack(">I", data[tdb_offset + 8 : tdb_offset + 12])[0]
@@ -322,10 +706,10 @@ def parse_tdb(data, tdb_offset):
     toc_offset = tdb_offset + 24
     data_area = toc_offset + table_count * 8
 
-    tables = {}
+    toc = {}
     for i in range(table_count):
         entry_off = toc_offset + i * 8
-        name_bytes = data[entry_off : entry_off + 4]
+        name_bytes = bytes(data[entry_off : entry_off + 4])
         # Names are stored reversed
         reversed_bytes = name_bytes[::-1]
         if all(32 <= b < 127 for b in reversed_bytes):
@@ -333,19 +717,110 @@ def parse_tdb(data, tdb_offset):
         else:
             name = f"0x{name_bytes.hex().upper()}"
         offset = struct.unpack(">I", data[entry_off + 4 : entry_off + 8])[0]
-        table_abs = data_area + offset
-
-        tables[name] = parse_table(data, table_abs, name)
+        toc[name] = data_area + offset
 
     return {
         "version": version,
         "db_size": db_size,
         "table_count": table_count,
         "tdb_offset": tdb_offset,
-        "tables": tables,
+        "toc": toc,
     }
 
 
+class LazyTables(Mapping):
+    """Read-only table_name -> table_info mapping that parses each table
+    header (and its field definitions) on first access."""
+
+    def __init__(self, data, toc, parsed=None):
+        self._data = data
+        self._toc = toc
+        self._parsed = dict(parsed or {})
+
+    def __getitem__(self, name):
+        t = self._parsed.get(name)
+        if t is None:
+            t = parse_table(self._data, self._toc[name], name)
+            self._parsed[name] = t
+        return t
+
+    def __contains__(self, name):
+        return name in self._toc
+
+    def __iter__(self):
+        return iter(self._toc)
+
+    def __len__(self):
+        return len(self._toc)
+
+    def loaded(self):
+        """The table_infos parsed so far, by name."""
+        return dict(self._parsed)
+
+
+def parse_tdb(data, tdb_offset, lazy=False):
+    """Parse a single TDB database at the given offset in data.
+
+    Returns a dict with 'tables' mapping table_name -> table_info. With
+    lazy=True, 'tables' is a LazyTables mapping and only the tables that are
+    actually looked up get their headers parsed.
+    """
+    db = read_toc(data, tdb_offset)
+    if lazy:
+        db["tables"] = LazyTables(data, db["toc"])
+    else:
+        db["tables"] = {
+            name: parse_table(data, table_abs, name)
+            for name, table_abs in db["toc"].items()
+        }
+    return db
+
+
+# Field definition: type, bit offset, 4-char name, bit width
+_FIELD_DEF = struct.Struct(">I I 4s I")
+
+_BIT_REVERSE = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+
+def tdb_crc(buf):
+    """CRC-32/MPEG-2 (MSB-first CRC-32, no final XOR), as used by TDB files.
+
+    Computed with zlib's reflected CRC-32 over bit-reversed bytes.
+    """
+    crc = zlib.crc32(bytes(buf).translate(_BIT_REVERSE))
+    return int(f"{crc:032b}"[::-1], 2) ^ 0xFFFFFFFF
+
+
+def tdb_checksums(db):
+    """Yield (label, crc_offset, start, end) for every checksum in a TDB.
+
+    db is a dict from read_toc/parse_tdb. The TDB header stores the CRC of
+    its first 20 bytes; each table header stores the CRC of its bytes 4-36
+    at 36; the first 4 bytes of each table hold the CRC of whatever
+    precedes it (the TOC for the first table, otherwise the previous
+    table's field definitions and records up to capacity); the last 4
+    bytes of the database cover the last table the same way.
+    """
+    tdb = db["tdb_offset"]
+    yield "TDB header", tdb + 20, tdb, tdb + 20
+    prev, label = tdb + 24, "table of contents"
+    for off, name in sorted((off, name) for name, off in db["toc"].items()):
+        yield label, off, prev, off
+        yield f"{name} header", off + 36, off + 4, off + 36
+        prev, label = off + 40, f"{name} records"
+    end = tdb + db["db_size"] - 4
+    yield label, end, prev, end
+
+
+def update_checksums(data, db):
+    """Recompute every checksum of a TDB in data (which must be mutable).
+
+    Call after patching records; SaveFile.flush() does this for you.
+    """
+    for _, crc_off, start, end in tdb_checksums(db):
+        struct.pack_into(">I", data, crc_off, tdb_crc(data[start:end]))
+
+
 def parse_table(data, table_offset, name):
     """Parse a table header, field definitions, and record data."""
     hdr = data[table_offset : table_offset + 40]
@@ -361,15 +836,14 @@ def parse_table(data, table_offset, name):
     # Parse field definitions (16 bytes each, starting after 40-byte header)
     fields = []
     field_start = table_offset + 40
+    if field_start + field_count * 16 > len(data):
+        return {"name": name, "error": "truncated field definitions"}
     for i in range(field_count):
         fd_off = field_start + i * 16
-        ftype = struct.unpack(">I", data[fd_off : fd_off + 4])[0]
-        bit_offset = struct.unpack(">I", data[fd_off + 4 : fd_off + 8])[0]
-        fname = data[fd_off + 8 : fd_off + 12].decode("ascii", errors="replace")
-        bits = struct.unpack(">I", data[fd_off + 12 : fd_off + 16])[0]
+        ftype, bit_offset, fname, bits = _FIELD_DEF.unpack_from(data, fd_off)
         fields.append(
             {
-                "name": fname,
+                "name": fname.decode("ascii", errors="replace"),
                 "type": ftype,
                 "bit_offset": bit_offset,
                 "bits": bits,
@@ -381,6 +855,7 @@ def parse_table(data, table_offset, name):
 
     return {
         "name": name,
+        "table_offset": table_offset,
         "alloc_type": alloc_type,
         "record_length": record_length,
         "capacity": capacity,
@@ -391,30 +866,635 @@ def parse_table(data, table_offset, name):
     }
 
 
-def read_records(data, table_info):
-    """Read all active records from a table."""
-    records = []
+_WHERE_OPS = ("==", "!=", "<=", ">=", "=", "<", ">")
+_WHERE_COND = re.compile(r"^\s*([^\s=!<>]+)\s*(==|!=|<=|>=|=|<|>)\s*(.*?)\s*$")
+# Either a quoted value right after an operator (skipped whole, so an AND
+# inside it doesn't split) or an AND between conditions
+_WHERE_SPLIT = re.compile(r"""(?:==|!=|<=|>=|=|<|>)\s*(?:"[^"]*"|'[^']*')"""
+                          r"|\s+AND\s+", re.IGNORECASE)
+
+
+def parse_where(text):
+    """Parse a filter like "TeamId=17 AND Overall>=80".
+
+    Returns a list of (field, op, value) conditions that must all hold.
+    Values are ints or floats when they parse as such, otherwise strings
+    (optionally quoted; an AND inside quotes is part of the value).
+    """
+    text = text.strip()
+    parts, start = [], 0
+    for m in _WHERE_SPLIT.finditer(text):
+        if m.group()[0].isspace():
+            parts.append(text[start:m.start()])
+            start = m.end()
+    parts.append(text[start:])
+    conditions = []
+    for part in parts:
+        m = _WHERE_COND.match(part)
+        if not m:
+            raise ValueError(f"Invalid condition: {part!r}")
+        name, op, value = m.groups()
+        if op == "=":
+            op = "=="
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+            value = value[1:-1]
+        else:
+            for conv in (int, float):
+                try:
+                    value = conv(value)
+                    break
+                except ValueError:
+                    pass
+        conditions.append((name, op, value))
+    return conditions
+
+
+def resolve_field(table_info, name):
+    """Find a field by raw code or by its friendly name in this table.
+
+    Friendly names come from the table's own TABLE_FIELD_NAMES entry only;
+    unmapped tables take raw codes. Returns the field dict, or None if the
+    table has no such field.
+    """
+    for f in table_info["fields"]:
+        if f["name"] == name:
+            return f
+    name_map = TABLE_FIELD_NAMES.get(table_info["name"])
+    if name_map is None:
+        return None
+    wanted = name.lower()
+    for f in table_info["fields"]:
+        if name_map.get(f["name"], "").lower() == wanted:
+            return f
+    return None
+
+
+def select_fields(table_info, columns):
+    """Resolve column names (raw codes or friendly names) to field dicts.
+
+    Returns the table's fields when columns is None. Raises KeyError for
+    names the table doesn't have.
+    """
+    if columns is None:
+        return table_info["fields"]
+    fields = []
+    missing = []
+    for c in columns:
+        f = resolve_field(table_info, c)
+        if f is None:
+            missing.append(c)
+        elif f not in fields:
+            fields.append(f)
+    if missing:
+        raise KeyError(f"Unknown field(s) in {table_info['name']}: "
+                       f"{', '.join(missing)}")
+    return fields
+
+
+def compile_predicate(table_info, where):
+    """Compile a filter into a function of a record's raw bytes.
+
+    where is a string for parse_where or a list of conditions. Only the
+    fields the conditions reference are extracted from the raw bits, so
+    rows can be rejected before anything else is decoded.
+    """
+    conditions = parse_where(where) if isinstance(where, str) else where
+    need = 0
+    tests = []
+    values = {}
+    for i, (name, op, value) in enumerate(conditions):
+        if op not in _WHERE_OPS:
+            raise ValueError(f"Unsupported operator: {op!r}")
+        op = "==" if op == "=" else op
+        f = resolve_field(table_info, name)
+        if f is None:
+            raise KeyError(f"Unknown field in {table_info['name']}: {name}")
+        if f["type"] in (FIELD_STRING, FIELD_BINARY):
+            expr = _field_expr(f, None, 0)
+            value = str(value)
+        else:
+            if not isinstance(value, (int, float)):
+                raise ValueError(f"{name} is numeric; got {value!r}")
+            start = f["bit_offset"] // 8
+            end = (f["bit_offset"] + f["bits"] + 7) // 8
+            need = max(need, end)
+            expr = _field_expr(f, f"_from_bytes(num[{start}:{end}], 'big')", end)
+        values[f"_v{i}"] = value
+        tests.append(f"({expr}) {op} _v{i}")
+
+    lines = [
+        "def match(rec):",
+        "    num = rec",
+        f"    if len(rec) < {need}:",
+        f"        num = bytes(rec) + bytes({need} - len(rec))",
+        f"    return {' and '.join(tests) or 'True'}",
+    ]
+    return _exec_source(lines, **values)["match"]
+
+
+def iter_records(data, table_info, lazy=False, columns=None, where=None):
+    """Yield the active records of a table one at a time.
+
+    With lazy=True, yields Record views that decode fields on access
+    instead of fully decoded dicts. columns restricts decoding to the given
+    fields (raw codes or friendly names) and where (see parse_where) skips
+    records before they are decoded. Schema errors are raised up front,
+    before the first record is yielded.
+    """
+    fields = select_fields(table_info, columns)
+    match = compile_predicate(table_info, where) if where else None
+    if lazy:
+        schema = record_schema(fields)
+
+        def decode(rec_bytes):
+            return Record(rec_bytes, schema)
+    else:
+        decode = compile_record_decoder(fields)
+    return _iter_decoded(data, table_info, decode, match)
+
+
+def _iter_decoded(data, table_info, decode, match):
+    rec_off = table_info["record_data_offset"]
+    rec_len = table_info["record_length"]
+    for i in range(table_info["record_count"]):
+        start = rec_off + i * rec_len
+        rec_bytes = data[start : start + rec_len]
+        if match is None or match(rec_bytes):
+            yield decode(rec_bytes)
+
+
+def read_records(data, table_info, lazy=False, columns=None, where=None):
+    """Read all active records from a table (see iter_records)."""
+    return list(iter_records(data, table_info, lazy=lazy, columns=columns,
+                             where=where))
+
+
+def write_records(data, table_info, updates):
+    """Patch records of a table in place. The counterpart of read_records.
+
+    data must be mutable (a bytearray, or a writable memoryview from
+    read_save(writable=True)). updates is an iterable of
+    (record_index, {field: value}) pairs, e.g. dict.items(); fields are raw
+    codes or friendly names. Only the bytes holding the given fields are
+    rewritten.
+
+    Every value is checked before anything is written, so a bad index,
+    field or value (KeyError/ValueError) leaves data untouched. Returns
+    the number of fields written. Checksums need update_checksums
+    afterwards (SaveFile.flush does it).
+    """
+    rec_off = table_info["record_data_offset"]
+    rec_len = table_info["record_length"]
+    count = table_info["record_count"]
+    fields = {}
+    planned = []
+    for index, values in updates:
+        if not 0 <= index < count:
+            raise ValueError(f"{table_info['name']}: record {index} out of "
+                             f"range (table has {count} records)")
+        for name, value in values.items():
+            field = fields.get(name)
+            if field is None:
+                field = resolve_field(table_info, name)
+                if field is None:
+                    raise KeyError(f"Unknown field(s) in {table_info['name']}: "
+                                   f"{name}")
+                fields[name] = field
+            planned.append((rec_off + index * rec_len, field,
+                            field_payload(field, value)))
+    for rec_start, field, payload in planned:
+        _store_payload(data, rec_start, field, payload)
+    return len(planned)
+
+
+# Tables whose alloc_type has this bit set have no record storage in the
+# file: capacity is reserved, but the next table follows the field
+# definitions directly (seen on empty INJY/TUNI tables).
+_ALLOC_NO_STORAGE = 0x10
+
+
+def allocated_slots(table_info):
+    """Number of record slots actually stored in the file for a table."""
+    if table_info["alloc_type"] & _ALLOC_NO_STORAGE:
+        return 0
+    return table_info["capacity"]
+
+
+def _set_record_count(data, table_info, count):
+    struct.pack_into(">H", data, table_info["table_offset"] + 22, count)
+    table_info["record_count"] = count
+
+
+def append_records(data, table_info, records):
+    """Append records to a table, up to its allocated capacity. Returns the
+    index of the first new record.
+
+    records is a list of {field: value} dicts (raw codes or friendly
+    names); fields left out are zero / empty. All new records are encoded
+    into one buffer and written with a single slice assignment, then the
+    header's record count (and table_info) is updated. Raises ValueError
+    if they don't fit or a value is invalid, before anything is written.
+    Checksums need update_checksums afterwards (SaveFile.flush does it).
+    """
+    rec_len = table_info["record_length"]
+    count = table_info["record_count"]
+    capacity = allocated_slots(table_info)
+    if count + len(records) > capacity:
+        raise ValueError(f"{table_info['name']}: {len(records)} new record(s) "
+                         f"don't fit ({count} of {capacity} slots used)")
+    block = bytearray(len(records) * rec_len)
+    write_records(
+        block,
+        {**table_info, "record_data_offset": 0, "record_count": len(records)},
+        enumerate(records),
+    )
+    start = table_info["record_data_offset"] + count * rec_len
+    data[start : start + len(block)] = block
+    _set_record_count(data, table_info, count + len(records))
+    return count
+
+
+def delete_records(data, table_info, indices):
+    """Delete records from a table and compact the rest. Returns the number
+    of records removed.
+
+    The remaining records keep their order and move down to fill the gaps
+    (the table is rewritten in one pass over its active region), the freed
+    slots at the end are zeroed and the header's record count (and
+    table_info) is updated. Checksums need update_checksums afterwards
+    (SaveFile.flush does it).
+    """
+    rec_off = table_info["record_data_offset"]
+    rec_len = table_info["record_length"]
+    count = table_info["record_count"]
+    doomed = set(indices)
+    bad = [i for i in doomed if not 0 <= i < count]
+    if bad:
+        raise ValueError(f"{table_info['name']}: record {min(bad)} out of "
+                         f"range (table has {count} records)")
+    region = table_region(data, table_info)
+    kept = b"".join(
+        bytes(region[i * rec_len : (i + 1) * rec_len])
+        for i in range(count) if i not in doomed
+    )
+    data[rec_off : rec_off + count * rec_len] = \
+        kept.ljust(count * rec_len, b"\x00")
+    _set_record_count(data, table_info, count - len(doomed))
+    return len(doomed)
+
+
+def table_region(data, table_info):
+    """The raw bytes of a table's active records."""
+    start = table_info["record_data_offset"]
+    return data[start : start + table_info["record_count"] *
+                table_info["record_length"]]
+
+
+def table_digest(data, table_info, salt=""):
+    """Hex digest of a table's schema and record region.
+
+    Two tables with the same digest decode to the same rows. salt is mixed
+    in so callers can also key on their own options.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(salt.encode())
+    h.update(repr((table_info["record_count"], table_info["record_length"],
+                   _schema_key(table_info["fields"]))).encode())
+    h.update(table_region(data, table_info))
+    return h.hexdigest()
+
+
+def _column_dtype(ftype, bit_width):
+    """Smallest NumPy dtype that holds a numeric field of bit_width bits."""
+    if ftype == FIELD_FLOAT and bit_width == 32:
+        return np.float32
+    signed = ftype == FIELD_SINT
+    for size, dtype in ((8, np.int8), (16, np.int16), (32, np.int32)):
+        if bit_width <= size:
+            return dtype if signed else getattr(np, f"uint{size}")
+    return np.int64 if signed else np.uint64
+
+
+def read_columns(data, table_info, columns=None):
+    """Decode a table column-wise into NumPy arrays.
+
+    The record region is viewed as a (record_count, record_length) uint8
+    array and each field is decoded for all records at once with shift/mask
+    operations. Returns a dict mapping field name -> 1-D array. UInt/SInt
+    fields use the smallest fitting integer dtype and 32-bit floats use
+    float32; String and Binary fields come back as object arrays of str.
+    columns optionally restricts decoding to the given fields (raw codes or
+    friendly names); the result is always keyed by raw code.
+    """
+    if np is None:
+        raise ImportError("read_columns() requires numpy (pip install numpy)")
+
     rec_off = table_info["record_data_offset"]
     rec_len = table_info["record_length"]
     rec_count = table_info["record_count"]
     fields = table_info["fields"]
+    if columns is not None:
+        fields = select_fields(table_info, columns)
+
+    # View the record region without copying. Anything past the end of the
+    # buffer reads as zero bits, matching extract_bits.
+    size = rec_count * rec_len
+    avail = max(0, min(size, len(data) - rec_off))
+    region = np.frombuffer(data, dtype=np.uint8, count=avail, offset=rec_off) \
+        if avail else np.zeros(0, dtype=np.uint8)
+    if avail < size:
+        region = np.concatenate([region, np.zeros(size - avail, dtype=np.uint8)])
+    region = region.reshape(rec_count, rec_len)
+    width = max(
+        [rec_len] + [(f["bit_offset"] + f["bits"] + 7) // 8 for f in fields]
+    )
+    if width > rec_len:
+        region = np.hstack(
+            [region, np.zeros((rec_count, width - rec_len), dtype=np.uint8)]
+        )
+
+    columns_out = {}
+    for f in fields:
+        ftype = f["type"]
+        bit_offset = f["bit_offset"]
+        bit_width = f["bits"]
+        start = bit_offset // 8
+
+        if ftype in (FIELD_STRING, FIELD_BINARY):
+            end = min(start + bit_width // 8, rec_len)
+            raw = [
+                bytes(data[pos + start : pos + end])
+                for pos in (rec_off + i * rec_len for i in range(rec_count))
+            ]
+            if ftype == FIELD_STRING:
+                values = [_decode_string(r) for r in raw]
+            else:
+                values = [r.hex() for r in raw]
+            col = np.empty(rec_count, dtype=object)
+            col[:] = values
+            columns_out[f["name"]] = col
+            continue
+
+        end = (bit_offset + bit_width + 7) // 8
+        if end - start > 8:
+            # Too wide for a uint64 accumulator; fall back to per-record decode
+            col = np.empty(rec_count, dtype=object)
+            col[:] = [decode_field(r.tobytes(), f) for r in region]
+            columns_out[f["name"]] = col
+            continue
+
+        raw = np.zeros(rec_count, dtype=np.uint64)
+        for b in range(start, end):
+            raw = (raw << np.uint64(8)) | region[:, b]
+        shift = end * 8 - bit_offset - bit_width
+        raw = (raw >> np.uint64(shift)) & np.uint64((1 << bit_width) - 1)
+
+        if ftype == FIELD_SINT and bit_width == 64:
+            col = raw.view(np.int64)
+        elif ftype == FIELD_SINT and bit_width > 0:
+            sign = np.int64(1 << (bit_width - 1))
+            values = (raw.astype(np.int64) ^ sign) - sign
+            col = values.astype(_column_dtype(ftype, bit_width))
+        elif ftype == FIELD_FLOAT and bit_width == 32:
+            col = raw.astype(np.uint32).view(np.float32)
+        else:
+            col = raw.astype(_column_dtype(FIELD_UINT, bit_width))
+        columns_out[f["name"]] = col
+
+    return columns_out
+
+
+_SET_OPS = ("+=", "-=", "*=", "/=", "=")
+_SET_ASSIGN = re.compile(r"^\s*([^\s=+\-*/]+)\s*(\+=|-=|\*=|/=|=)\s*(.*?)\s*$")
+
+_COMPARE = {
+    "==": operator.eq, "!=": operator.ne, "<": operator.lt,
+    "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+
+_ARITH = {
+    "+=": operator.add, "-=": operator.sub, "*=": operator.mul,
+    "/=": operator.truediv,
+}
+
+
+def parse_set(text):
+    """Parse assignments like "Overall += 3, Speed = 90".
+
+    Returns a list of (field, op, value) with op one of =, +=, -=, *=, /=
+    and a numeric value.
+    """
+    assignments = []
+    for part in text.split(","):
+        m = _SET_ASSIGN.match(part)
+        if not m:
+            raise ValueError(f"Invalid assignment: {part!r}")
+        name, op, value = m.groups()
+        for conv in (int, float):
+            try:
+                value = conv(value)
+                break
+            except ValueError:
+                pass
+        else:
+            raise ValueError(f"{name}: {value!r} is not a number")
+        assignments.append((name, op, value))
+    return assignments
 
-    for i in range(rec_count):
-        start = rec_off + i * rec_len
-        rec_bytes = data[start : start + rec_len]
-        row = {}
-        for field in fields:
-            row[field["name"]] = decode_field(rec_bytes, field)
-        records.append(row)
 
-    return records
+def update_columns(data, table_info, assignments, where=None, clamp=False):
+    """Apply assignments to every matching record in one vectorized pass.
 
+    assignments is a string for parse_set or a list of (field, op, value);
+    where filters records like iter_records. Both read the fields they
+    need with read_columns, the new values are computed with NumPy and
+    the bits are written back through the same uint64 shift/mask view of
+    the record region, so e.g. "Overall += 3" where "TeamId == 17" never
+    loops over records in Python. data must be writable (see read_save).
 
-def find_tdbs(data):
+    Integer results are rounded to the nearest integer. Values that don't
+    fit a field raise ValueError, or are clamped to its range with
+    clamp=True; operands beyond int64, division by zero and NaN/inf
+    results always raise ValueError. Errors name fields as given.
+    Everything is checked before anything is written. Returns the number
+    of records updated. Checksums need update_checksums afterwards
+    (SaveFile.flush does it).
+    """
+    if np is None:
+        raise ImportError("update_columns() requires numpy (pip install numpy)")
+    if memoryview(data).readonly:
+        raise ValueError("Data is read-only; open the save with writable=True")
+    name = table_info["name"]
+    rec_off = table_info["record_data_offset"]
+    rec_len = table_info["record_length"]
+    rec_count = table_info["record_count"]
+    if isinstance(assignments, str):
+        assignments = parse_set(assignments)
+    conditions = parse_where(where) if isinstance(where, str) else where or []
+
+    targets = []
+    for field_name, op, value in assignments:
+        if op not in _SET_OPS:
+            raise ValueError(f"Unsupported operator: {op!r}")
+        f = resolve_field(table_info, field_name)
+        if f is None:
+            raise KeyError(f"Unknown field in {name}: {field_name}")
+        if f["type"] in (FIELD_STRING, FIELD_BINARY):
+            raise ValueError(f"{field_name}: bulk updates need a numeric field")
+        if (f["bit_offset"] + f["bits"] + 7) // 8 > rec_len or f["bits"] > 63:
+            raise ValueError(f"{field_name}: field is too wide for bulk updates")
+        if any(t[0] is f for t in targets):
+            raise ValueError(f"{field_name} is assigned more than once")
+        # Python ints are unbounded; NumPy can't take them past int64
+        if isinstance(value, int) and not -(1 << 63) <= value < (1 << 63):
+            raise ValueError(f"{field_name}: {value} is out of range")
+        if not np.isfinite(value):
+            raise ValueError(f"{field_name}: {value!r} is not a finite number")
+        if op == "/=" and value == 0:
+            raise ValueError(f"{field_name}: division by zero")
+        targets.append((field_name, f, op, value))
+    tests = []
+    for field_name, op, value in conditions:
+        op = "==" if op == "=" else op
+        if op not in _COMPARE:
+            raise ValueError(f"Unsupported operator: {op!r}")
+        f = resolve_field(table_info, field_name)
+        if f is None:
+            raise KeyError(f"Unknown field in {name}: {field_name}")
+        if f["type"] in (FIELD_STRING, FIELD_BINARY):
+            value = str(value)
+        elif not isinstance(value, (int, float)):
+            raise ValueError(f"{field_name} is numeric; got {value!r}")
+        tests.append((f, op, value))
+
+    codes = {f["name"] for f, _, _ in tests}
+    codes.update(f["name"] for _, f, _, _ in targets)
+    cols = read_columns(data, table_info, columns=sorted(codes))
+    mask = np.ones(rec_count, dtype=bool)
+    for f, op, value in tests:
+        mask &= _COMPARE[op](cols[f["name"]], value)
+    rows = np.flatnonzero(mask)
+    if not rows.size:
+        return 0
+
+    # The last record can be cut short by the end of the data; it is
+    # written with store_bits instead of through the 2-D view.
+    n_full = max(0, min(rec_count, (len(data) - rec_off) // rec_len))
+    full_rows = rows[rows < n_full]
+    tail_rows = rows[rows >= n_full]
+
+    planned = []
+    for field_name, f, op, value in targets:
+        bits = f["bits"]
+        end = (f["bit_offset"] + bits + 7) // 8
+        for i in tail_rows:
+            if rec_off + int(i) * rec_len + end > len(data):
+                raise ValueError(f"{field_name}: record {i} is truncated")
+        is_float = f["type"] == FIELD_FLOAT and bits == 32
+        current = cols[f["name"]][rows].astype(np.float64 if is_float else np.int64)
+        # Overflow and NaN inputs are caught below rather than warned about
+        with np.errstate(all="ignore"):
+            if op == "=":
+                new = np.full(rows.size, value)
+            else:
+                new = _ARITH[op](current, value)
+            if new.dtype.kind == "i" and op != "=":
+                # int64 arithmetic wraps around silently; saturate results
+                # beyond its range so they are clamped or reported below
+                wide = _ARITH[op](current.astype(np.float64), value)
+                new[wide >= 2.0 ** 63] = np.iinfo(np.int64).max
+                new[wide < -2.0 ** 63] = np.iinfo(np.int64).min
+            if is_float:
+                new = new.astype(np.float32)
+        # NaN or inf can't be clamped, and casting them to int is undefined
+        bad = int(np.count_nonzero(~np.isfinite(new)))
+        if bad:
+            raise ValueError(f"{field_name}: {bad} result(s) are not finite "
+                             f"numbers")
+
+        if is_float:
+            raw = new.view(np.uint32).astype(np.uint64)
+        else:
+            if new.dtype.kind == "f":
+                new = np.rint(new)
+            if f["type"] == FIELD_SINT and bits:
+                low, high = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+            else:
+                low, high = 0, (1 << bits) - 1
+            if clamp:
+                new = np.clip(new, low, high)
+            else:
+                bad = int(np.count_nonzero((new < low) | (new > high)))
+                if bad:
+                    raise ValueError(f"{field_name}: {bad} value(s) out of "
+                                     f"range ({low}..{high})")
+            raw = (new.astype(np.int64) & ((1 << bits) - 1)).astype(np.uint64)
+        planned.append((f, raw))
+
+    region = np.frombuffer(data, dtype=np.uint8, count=n_full * rec_len,
+                           offset=rec_off).reshape(n_full, rec_len)
+    for f, raw in planned:
+        bit_offset, bits = f["bit_offset"], f["bits"]
+        start = bit_offset // 8
+        end = (bit_offset + bits + 7) // 8
+        shift = end * 8 - bit_offset - bits
+        field_mask = np.uint64(((1 << bits) - 1) << shift)
+        acc = np.zeros(full_rows.size, dtype=np.uint64)
+        for b in range(start, end):
+            acc = (acc << np.uint64(8)) | region[full_rows, b]
+        acc = (acc & ~field_mask) | ((raw[: full_rows.size] << np.uint64(shift))
+                                     & field_mask)
+        for b in range(start, end):
+            region[full_rows, b] = (acc >> np.uint64((end - 1 - b) * 8)) & 0xFF
+        for i, r in zip(tail_rows, raw[full_rows.size :]):
+            store_bits(data, (rec_off + int(i) * rec_len) * 8 + bit_offset,
+                       bits, int(r))
+    return int(rows.size)
+
+
+# "DB" magic + version 8; regexes so the searches also work on
+# mmap/memoryview
+_TDB_MAGIC = re.compile(re.escape(b"DB\x00\x08"))
+_NONZERO = re.compile(rb"[^\x00]")
+
+
+def _db_size(data, off):
+    """The db_size of the TDB at off (at least its 24-byte header)."""
+    if off + 12 > len(data):
+        return 24
+    return max(struct.unpack_from(">I", data, off + 8)[0], 24)
+
+
+def _tdb_at(data, off, check_crc):
+    """Whether a plausible TDB header starts at off.
+
+    The header's db_size and table count must fit the buffer; with
+    check_crc the header checksum must match too, which rules out stray
+    "DB" bytes inside record data.
+    """
+    if off + 24 > len(data) or data[off : off + 4] != b"DB\x00\x08":
+        return False
+    db_size = struct.unpack_from(">I", data, off + 8)[0]
+    table_count = struct.unpack_from(">I", data, off + 16)[0]
+    if not 0 < table_count or 24 + table_count * 8 + 4 > db_size:
+        return False
+    if off + db_size > len(data):
+        return False
+    if check_crc:
+        stored = struct.unpack_from(">I", data, off + 20)[0]
+        return stored == tdb_crc(data[off : off + 20])
+    return True
+
+
+def find_tdbs(data, scan=False):
     """Find all TDB databases in the file.
 
-    Handles MC02 wrapper and scans for additional TDB databases
-    (dynasty files have two).
+    Handles the MC02 wrapper, then follows the container structure:
+    each database's db_size leads to the next one (dynasty files have
+    two), skipping any zero padding in between. Only if non-zero bytes
+    that aren't a database turn up after that (or with scan=True) are
+    the remaining bytes scanned for the "DB" magic, and then a candidate
+    only counts if its header checksum is valid.
     """
     tdbs = []
 
@@ -440,25 +1520,40 @@ def find_tdbs(data):
         first_tdb = 0
         timestamp = None
     else:
-        raise ValueError(f"Unknown file format (magic: {data[:4]!r})")
-
-    # Parse first TDB
-    if data[first_tdb : first_tdb + 2] == b"DB":
-        tdbs.append(first_tdb)
-
-    # Scan for additional TDBs (dynasty files have two)
-    # Search for "DB\x00\x08" pattern after the first TDB
-    search_start = first_tdb + 24  # skip first TDB header
-    while search_start < len(data) - 24:
-        idx = data.find(b"DB\x00\x08", search_start)
-        if idx < 0:
+        raise ValueError(f"Unknown file format (magic: {bytes(data[:4])!r})")
+
+    if data[first_tdb : first_tdb + 2] != b"DB":
+        return tdbs, timestamp
+    tdbs.append(first_tdb)
+
+    # Walk the databases: each one's db_size leads to where the next starts
+    end = first_tdb + _db_size(data, first_tdb)
+    while not scan:
+        # The padding after the last database is usually all that's left;
+        # one bulk compare settles that without a byte-wise search
+        tail = data[end:]
+        if bytes(tail) == bytes(len(tail)):
+            return tdbs, timestamp
+        off = _NONZERO.search(data, end).start()
+        # Right after the previous database the structure vouches for the
+        # header; after padding its checksum has to as well
+        if not _tdb_at(data, off, check_crc=off != end):
+            break
+        tdbs.append(off)
+        end = off + _db_size(data, off)
+
+    # Fallback: scan for the magic and keep only validated headers
+    search_start = first_tdb + 24 if scan else end
+    while True:
+        match = _TDB_MAGIC.search(data, search_start)
+        if match is None:
             break
-        # Validate: check table_count is reasonable
-        tc = struct.unpack(">I", data[idx + 16 : idx + 20])[0]
-        ds = struct.unpack(">I", data[idx + 8 : idx + 12])[0]
-        if 0 < tc < 500 and ds > 0 and idx != first_tdb:
+        idx = match.start()
+        if _tdb_at(data, idx, check_crc=True):
             tdbs.append(idx)
-        search_start = idx + 24
+            search_start = idx + _db_size(data, idx)
+        else:
+            search_start = idx + 4
 
     return tdbs, timestamp
 
@@ -487,9 +1582,16 @@ def format_schema(table_info):
 
 def records_to_csv(records, fields, output=None, friendly_names=False,
                    table_name=None):
-    """Write records as CSV. Returns string if output is None."""
-    if not records:
-        return ""
+    """Write records as CSV.
+
+    records may be any iterable (e.g. iter_records()); rows are written as
+    they are produced. Returns the CSV text if output is None, otherwise the
+    number of records written. Nothing is written for an empty table.
+    """
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return "" if output is None else 0
 
     # Sort fields by bit_offset for consistent column order
     sorted_fields = sorted(fields, key=lambda f: f["bit_offset"])
@@ -505,341 +1607,2733 @@ def records_to_csv(records, fields, output=None, friendly_names=False,
     def _write(dest):
         writer = csv.writer(dest)
         writer.writerow(header_names)
-        for rec in records:
+        count = 0
+        for rec in itertools.chain((first,), records):
             writer.writerow([rec.get(n, "") for n in raw_names])
+            count += 1
+        return count
 
     if output is None:
         buf = io.StringIO()
         _write(buf)
         return buf.getvalue()
     else:
-        _write(output)
+        return _write(output)
 
 
-def load_file(path):
-    """Load a save file and return (data, tdb_offsets, timestamp)."""
-    with open(path, "rb") as f:
-        data = f.read()
-    tdb_offsets, timestamp = find_tdbs(data)
+# Xbox 360 STFS packages (the console's own save containers). Blocks are
+# 0x1000 bytes; every 0xAA data blocks are preceded by a level-0 hash
+# table, every 0xAA level-0 tables by a level-1 table and so on. Unless
+# bit 0 of the block separation byte is set, packages keep two copies of
+# each hash table, of which one is active.
+STFS_MAGICS = (b"CON ", b"LIVE", b"PIRS")
+_STFS_BLOCK = 0x1000
+_STFS_PER_TABLE = 0xAA
+_STFS_PER_L1 = _STFS_PER_TABLE * _STFS_PER_TABLE
+# File table entry: name, flags (name length, consecutive, directory),
+# valid and allocated block counts and starting block (24-bit
+# little-endian), parent directory, size
+_STFS_ENTRY = struct.Struct(">40s B 3s 3s 3s h I 8x")
+
+
+def read_stfs_header(data):
+    """Parse the STFS volume descriptor of a CON/LIVE/PIRS package.
+
+    Returns a dict with what's needed to locate blocks: where block
+    storage starts, the hash-table layout and the file table's location.
+    """
+    if data[:4] not in STFS_MAGICS:
+        raise ValueError(f"Not an STFS package (magic: {bytes(data[:4])!r})")
+    if len(data) < 0x3A0:
+        raise ValueError("STFS header is truncated")
+    header_size = struct.unpack_from(">I", data, 0x340)[0]
+    separation = data[0x37B]
+    shift = ~separation & 1
+    total_blocks = struct.unpack_from(">I", data, 0x395)[0]
+    if total_blocks <= _STFS_PER_TABLE:
+        top_level = 0
+    elif total_blocks <= _STFS_PER_L1:
+        top_level = 1
+    else:
+        top_level = 2
+    return {
+        "base": (header_size + _STFS_BLOCK - 1) & ~(_STFS_BLOCK - 1),
+        "separation": separation,
+        "shift": shift,
+        "steps": (0xAB, 0x718F) if not shift else (0xAC, 0x723A),
+        "top_level": top_level,
+        "file_table_blocks": struct.unpack_from("<H", data, 0x37C)[0],
+        "file_table_block": int.from_bytes(data[0x37E:0x381], "little"),
+    }
+
+
+def _stfs_block_offset(pkg, block):
+    """File offset of data block number block."""
+    shift = pkg["shift"]
+    backing = block + ((block + _STFS_PER_TABLE) // _STFS_PER_TABLE << shift)
+    if block >= _STFS_PER_TABLE:
+        backing += (block + _STFS_PER_L1) // _STFS_PER_L1 << shift
+        if block >= _STFS_PER_L1:
+            backing += 1 << shift
+    return pkg["base"] + backing * _STFS_BLOCK
+
+
+def _stfs_hash_entry(data, pkg, block, level=0):
+    """File offset of the active hash entry for block at a hash level."""
+    shift = pkg["shift"]
+    step0, step1 = pkg["steps"]
+    if level == 0:
+        if block < _STFS_PER_TABLE:
+            backing = 0
+        else:
+            backing = (block // _STFS_PER_TABLE) * step0
+            backing += (block // _STFS_PER_L1 + 1) << shift
+            if block >= _STFS_PER_L1:
+                backing += 1 << shift
+        index = block % _STFS_PER_TABLE
+    elif level == 1:
+        if block < _STFS_PER_L1:
+            backing = step0
+        else:
+            backing = (1 << shift) + (block // _STFS_PER_L1) * step1
+        index = block // _STFS_PER_TABLE % _STFS_PER_TABLE
+    else:
+        backing = step1
+        index = block // _STFS_PER_L1 % _STFS_PER_TABLE
+    offset = pkg["base"] + backing * _STFS_BLOCK + index * 0x18
+    if shift:
+        # The level above says which of the two copies is current
+        if level == pkg["top_level"]:
+            offset += (pkg["separation"] & 2) << 11
+        else:
+            upper = _stfs_hash_entry(data, pkg, block, level + 1)
+            offset += (data[upper + 0x14] & 0x40) << 6
+    return offset
+
+
+def _stfs_blocks(data, pkg, start, count, consecutive):
+    """Block numbers of a file stored from block start, in order."""
+    if consecutive:
+        return range(start, start + count)
+    blocks = []
+    block = start
+    for _ in range(count):
+        blocks.append(block)
+        entry = _stfs_hash_entry(data, pkg, block)
+        block = int.from_bytes(data[entry + 0x15 : entry + 0x18], "big")
+    return blocks
+
+
+def stfs_files(data, pkg=None):
+    """List the files in an STFS package.
+
+    Returns dicts with name, size, start_block, block_count, consecutive
+    and directory, in file table order.
+    """
+    if pkg is None:
+        pkg = read_stfs_header(data)
+    files = []
+    table_blocks = _stfs_blocks(data, pkg, pkg["file_table_block"],
+                                pkg["file_table_blocks"], consecutive=False)
+    for block in table_blocks:
+        off = _stfs_block_offset(pkg, block)
+        if off + _STFS_BLOCK > len(data):
+            raise ValueError("STFS file table is truncated")
+        for entry_off in range(off, off + _STFS_BLOCK, _STFS_ENTRY.size):
+            (name, flags, _, blocks, start,
+             _, size) = _STFS_ENTRY.unpack_from(data, entry_off)
+            if not name[0]:
+                break
+            files.append({
+                "name": name[: flags & 0x3F].decode("ascii", errors="replace"),
+                "size": size,
+                "start_block": int.from_bytes(start, "little"),
+                "block_count": int.from_bytes(blocks, "little"),
+                "consecutive": bool(flags & 0x40),
+                "directory": bool(flags & 0x80),
+            })
+    return files
+
+
+def stfs_read_file(data, entry, pkg=None):
+    """Return the contents of one file (an stfs_files entry) as bytes.
+
+    The blocks are gathered as zero-copy slices of data (which may be a
+    memory map) and joined once; runs of blocks between hash tables are
+    copied as single slices.
+    """
+    if pkg is None:
+        pkg = read_stfs_header(data)
+    view = memoryview(data)
+    pieces = []
+    remaining = entry["size"]
+    run_start = run_end = None
+    for block in _stfs_blocks(data, pkg, entry["start_block"],
+                              entry["block_count"], entry["consecutive"]):
+        if remaining <= 0:
+            break
+        off = _stfs_block_offset(pkg, block)
+        n = min(_STFS_BLOCK, remaining)
+        if off + n > len(data):
+            raise ValueError(f"STFS file {entry['name']} is truncated")
+        remaining -= n
+        if off == run_end:
+            run_end = off + n
+            continue
+        if run_start is not None:
+            pieces.append(view[run_start:run_end])
+        run_start, run_end = off, off + n
+    if run_start is not None:
+        pieces.append(view[run_start:run_end])
+    if remaining > 0:
+        raise ValueError(f"STFS file {entry['name']} is truncated")
+    return b"".join(pieces)
+
+
+def extract_stfs_save(data):
+    """Return the save file inside an STFS package: its largest file."""
+    pkg = read_stfs_header(data)
+    files = [f for f in stfs_files(data, pkg) if not f["directory"]]
+    if not files:
+        raise ValueError("STFS package contains no files")
+    return stfs_read_file(data, max(files, key=lambda f: f["size"]), pkg)
+
+
+def read_save(path, use_mmap=False, writable=False):
+    """Return a save file's contents.
+
+    With use_mmap=True, this is a read-only memoryview over a memory map of
+    the file instead of a bytes copy, so record and header slices are
+    zero-copy and pages are shared with the OS cache.
+
+    With writable=True the result can be patched (see write_records): a
+    writable memoryview whose changes go straight to the file with
+    use_mmap, otherwise a bytearray copy (which only needs read access).
+
+    Console STFS packages (CON/LIVE/PIRS) are unwrapped transparently:
+    the save inside is read out of the (memory-mapped) package and
+    returned as bytes. They can't be opened writable, since the package's
+    hashes and signature would need to be redone.
+    """
+    with open(path, "r+b" if writable and use_mmap else "rb") as f:
+        if f.read(4) in STFS_MAGICS:
+            if writable:
+                raise ValueError(f"{path} is an STFS package; extract the "
+                                 f"save from it before editing")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return extract_stfs_save(mm)
+        f.seek(0)
+        if use_mmap:
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            return memoryview(mmap.mmap(f.fileno(), 0, access=access))
+        return bytearray(f.read()) if writable else f.read()
+
+
+def release_save(data):
+    """Release the memory map behind read_save(use_mmap=True) data, if any.
+
+    Lazy Record views and read_columns results may still hold slices of
+    the map; it then stays open until the last of them is collected.
+    """
+    if isinstance(data, memoryview):
+        backing = data.obj
+        data.release()
+        if isinstance(backing, mmap.mmap):
+            try:
+                backing.close()
+            except BufferError:
+                pass
+
+
+def load_file(path, use_mmap=False, writable=False):
+    """Load a save file and return (data, tdb_offsets, timestamp).
+
+    See read_save for use_mmap and writable.
+    """
+    try:
+        data = read_save(path, use_mmap=use_mmap, writable=writable)
+        tdb_offsets, timestamp = find_tdbs(data)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
     if not tdb_offsets:
         print(f"Error: No TDB databases found in {path}", file=sys.stderr)
         sys.exit(1)
-    return data, tdb_offsets, timestamp
+    return data, tdb_offsets, timestamp
+
+
+def find_table_in_file(data, tdb_offsets, table_name, db_idx=None):
+    """Find a table by name across TDB databases. Returns (data, table_info)."""
+    target = table_name.upper()
+    if db_idx is not None:
+        indices = [db_idx]
+    else:
+        indices = range(len(tdb_offsets))
+
+    for idx in indices:
+        db = parse_tdb(data, tdb_offsets[idx])
+        if target in db["tables"]:
+            return data, db["tables"][target]
+
+    return None, None
+
+
+# On-disk cache of parsed TOCs, table headers and field definitions (see
+# SaveFile.open). Entries are marshal data: plain dicts, lists, ints and
+# strings, which load several times faster than they parse (and unlike
+# pickle, loading can't run code). Bump the version when the cached
+# layout changes.
+SCHEMA_CACHE_ENV = "TDB_CACHE_DIR"
+SCHEMA_CACHE_VERSION = 1
+
+
+def header_digest(data, tdb_offsets):
+    """Hex digest of every byte parse_tdb reads: the MC02 header, and each
+    TDB's header, TOC, table headers and field definitions.
+
+    Record data and the checksums over it aren't included, so edits to
+    records keep the digest; any change to a count, capacity or field
+    layout changes it.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{SCHEMA_CACHE_VERSION}:{marshal.version}:{tdb_offsets}".encode())
+    h.update(data[: tdb_offsets[0] if tdb_offsets else 0])
+    for tdb in tdb_offsets:
+        h.update(data[tdb : tdb + 24])
+        db = read_toc(data, tdb)
+        h.update(data[tdb + 24 : tdb + 24 + db["table_count"] * 8])
+        for off in db["toc"].values():
+            # Skip the checksums at 0-4 and 36-40; the first covers the
+            # previous table's records
+            h.update(data[off + 4 : off + 36])
+            if off + 29 <= len(data):
+                h.update(data[off + 40 : off + 40 + data[off + 28] * 16])
+    return h.hexdigest()
+
+
+def file_cache_key(path):
+    """Hex key for a save file as it is on disk right now: its resolved
+    path, inode, size and modification/change times. Any write to the file
+    changes it. None if the file can't be examined."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{SCHEMA_CACHE_VERSION}:{os.path.realpath(path)}:{st.st_ino}:"
+             f"{st.st_size}:{st.st_mtime_ns}:{st.st_ctime_ns}".encode())
+    return h.hexdigest()
+
+
+def _load_cache_entry(cache_dir, name):
+    try:
+        with open(os.path.join(cache_dir, name), "rb") as f:
+            return marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _store_cache_entry(cache_dir, name, value):
+    """Write a cache entry through a temporary file and a rename, so
+    concurrent readers never see a partial entry. Failures (read-only or
+    full disk) are ignored."""
+    path = os.path.join(cache_dir, name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(marshal.dumps(value))
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def load_cached_dbs(cache_dir, digest):
+    """Parsed databases stored under digest, or None on a miss."""
+    return _load_cache_entry(cache_dir, digest + ".cache")
+
+
+def store_cached_dbs(cache_dir, digest, dbs):
+    """Store fully parsed databases under digest (see _store_cache_entry)."""
+    _store_cache_entry(cache_dir, digest + ".cache",
+                       [dict(db, tables=dict(db["tables"])) for db in dbs])
+
+
+def _load_cached_location(cache_dir, key):
+    """(header digest, tdb_offsets, timestamp) recorded for a
+    file_cache_key, or None on a miss."""
+    entry = _load_cache_entry(cache_dir, key + ".key")
+    return tuple(entry) if isinstance(entry, list) and len(entry) == 3 else None
+
+
+def _store_cached_location(cache_dir, key, digest, tdb_offsets, timestamp):
+    _store_cache_entry(cache_dir, key + ".key",
+                       [digest, list(tdb_offsets), timestamp])
+
+
+# Default memory budget of a TableCache, in bytes
+DECODED_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def _approx_size(value):
+    """Rough memory footprint of a decoded table, estimated from a sample.
+
+    value is a list of record dicts (read_records) or a dict of column
+    arrays (read_columns).
+    """
+    if isinstance(value, list):
+        if not value:
+            return sys.getsizeof(value)
+        sample = value[: 16]
+        # Small ints are shared singletons and cost nothing per record
+        per_record = sum(sys.getsizeof(rec) +
+                         sum(sys.getsizeof(v) for v in rec.values()
+                             if not (type(v) is int and -5 <= v <= 256))
+                         for rec in sample) / len(sample)
+        return sys.getsizeof(value) + int(per_record * len(value))
+    size = sys.getsizeof(value)
+    for col in value.values():
+        size += col.nbytes
+        if col.dtype == object and len(col):
+            sample = col[: 16]
+            size += int(sum(sys.getsizeof(v) for v in sample) / len(sample)
+                        * len(col))
+    return size
+
+
+class TableCache:
+    """In-process LRU cache of decoded tables and columns.
+
+    Entries are keyed by the table's content (table_digest: schema, record
+    count and record bytes) plus the projection and filter, so they are
+    shared by every open copy of a save and can't go stale: once a table
+    changes on disk or is edited in place, lookups miss and the old entry
+    ages out. The least recently used entries are evicted to keep the
+    estimated size within max_bytes; a single result larger than that is
+    returned uncached.
+
+    Cached results are shared between callers and must not be modified.
+    The cache can be used from several threads; decoding happens outside
+    its lock, so two threads missing on the same table at once both
+    decode it.
+    """
+
+    def __init__(self, max_bytes=DECODED_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def _lookup(self, key, load):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = load()
+        size = _approx_size(value)
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+        return value
+
+    def records(self, data, table_info, columns=None, where=None,
+                digest=None):
+        """read_records(data, table_info, columns=..., where=...), cached.
+
+        digest is the table's table_digest, if the caller already knows it
+        (saves hashing the table on every lookup).
+        """
+        fields = select_fields(table_info, columns)
+        if isinstance(where, str):
+            where = parse_where(where)
+        key = ("records", digest or table_digest(data, table_info),
+               tuple(f["name"] for f in fields),
+               tuple(where) if where else None)
+        return self._lookup(key, lambda: read_records(
+            data, table_info, columns=columns, where=where))
+
+    def columns(self, data, table_info, columns=None, digest=None):
+        """read_columns(data, table_info, columns), cached (see records)."""
+        fields = select_fields(table_info, columns)
+        key = ("columns", digest or table_digest(data, table_info),
+               tuple(f["name"] for f in fields))
+        return self._lookup(key, lambda: read_columns(
+            data, table_info, columns=columns))
+
+    def stats(self):
+        """Hit/miss/eviction counters and the current size, as a dict."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        """Drop every entry (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def retain(self, digests):
+        """Drop the entries of tables whose digest isn't in digests, e.g.
+        versions of a save that has since been reloaded."""
+        with self._lock:
+            for key in [k for k in self._entries if k[1] not in digests]:
+                self.size -= self._entries.pop(key)[1]
+
+
+class SaveFile:
+    """A save file parsed once: MC02 header, TDB TOCs and table headers.
+
+    Keeps a name -> table index across all databases so repeated lookups
+    don't re-parse anything. When a table name exists in more than one
+    database, the first database wins (same as find_table_in_file).
+
+    By default (lazy=True) only the TOCs are read up front; each table's
+    header and field definitions are parsed the first time it is accessed.
+    dbs may be passed in already parsed (e.g. from the schema cache).
+    """
+
+    def __init__(self, data, tdb_offsets=None, timestamp=None, path=None,
+                 lazy=True, dbs=None):
+        # data may be bytes or a memoryview from load_file(use_mmap=True)
+        if tdb_offsets is None:
+            tdb_offsets, timestamp = find_tdbs(data)
+        self.data = data
+        self.path = path
+        self.tdb_offsets = tdb_offsets
+        self.timestamp = timestamp
+        if dbs is None:
+            dbs = [parse_tdb(data, off, lazy=lazy) for off in tdb_offsets]
+        self.dbs = dbs
+        self._index = {}
+        for db_idx, db in enumerate(self.dbs):
+            for name in db["tables"]:
+                self._index.setdefault(name, db_idx)
+
+    @classmethod
+    def open(cls, path, lazy=True, use_mmap=False, writable=False,
+             cache_dir=None):
+        """Load and parse a save file (exits on unreadable files, like load_file).
+
+        With cache_dir, the on-disk schema cache is used. A file unchanged
+        since it was last opened (same file_cache_key) is mapped and its
+        headers come straight from the cache: no TDB search, hashing or
+        header parsing at all. Otherwise the headers are looked up by
+        header_digest, so an edited or copied save with the same layout
+        still skips parsing them. If neither lookup hits, every header is
+        parsed to fill the cache, whatever lazy says.
+        """
+        key = file_cache_key(path) if cache_dir else None
+        location = key and _load_cached_location(cache_dir, key)
+        if location:
+            digest, tdb_offsets, timestamp = location
+            dbs = load_cached_dbs(cache_dir, digest)
+            if dbs is not None:
+                try:
+                    data = read_save(path, use_mmap=use_mmap,
+                                     writable=writable)
+                except ValueError as e:
+                    print(f"Error: {e}", file=sys.stderr)
+                    sys.exit(1)
+                # Cheap guard against a file rewritten within the stat's
+                # time resolution
+                if all(data[off : off + 4] == b"DB\x00\x08"
+                       for off in tdb_offsets):
+                    return cls(data, tdb_offsets, timestamp, path=path,
+                               dbs=dbs)
+                release_save(data)
+
+        data, tdb_offsets, timestamp = load_file(path, use_mmap=use_mmap,
+                                                 writable=writable)
+        if not cache_dir:
+            return cls(data, tdb_offsets, timestamp, path=path, lazy=lazy)
+        digest = header_digest(data, tdb_offsets)
+        dbs = load_cached_dbs(cache_dir, digest)
+        if dbs is None:
+            dbs = [parse_tdb(data, off) for off in tdb_offsets]
+            store_cached_dbs(cache_dir, digest, dbs)
+        if key:
+            _store_cached_location(cache_dir, key, digest, tdb_offsets,
+                                  timestamp)
+        return cls(data, tdb_offsets, timestamp, path=path, dbs=dbs)
+
+    def flush(self, path=None):
+        """Write edits back to the file, recomputing the TDB checksums first.
+
+        A writable memory map is flushed; a bytearray copy is written out
+        in full. With path, the edited save is written there instead.
+        """
+        if memoryview(self.data).readonly:
+            return
+        for db in self.dbs:
+            update_checksums(self.data, db)
+        if path is not None or isinstance(self.data, bytearray):
+            with open(path or self.path, "wb") as f:
+                f.write(self.data)
+        elif isinstance(self.data.obj, mmap.mmap):
+            self.data.obj.flush()
+
+    def close(self):
+        """Release the memory map backing data, if any."""
+        release_save(self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def table(self, name, db_idx=None):
+        """Return the table_info for name, or None if it doesn't exist."""
+        target = name.upper()
+        if db_idx is None:
+            db_idx = self._index.get(target)
+            if db_idx is None:
+                return None
+        if not 0 <= db_idx < len(self.dbs):
+            return None
+        return self.dbs[db_idx]["tables"].get(target)
+
+    def tables(self, db_idx=None):
+        """Return (db_idx, name, table_info) for every table, sorted by name
+        within each database."""
+        indices = [db_idx] if db_idx is not None else range(len(self.dbs))
+        result = []
+        for idx in indices:
+            if not 0 <= idx < len(self.dbs):
+                continue
+            db_tables = self.dbs[idx]["tables"]
+            for name in sorted(db_tables):
+                result.append((idx, name, db_tables[name]))
+        return result
+
+    def iter_records(self, name, db_idx=None, lazy=False, columns=None,
+                     where=None):
+        """Yield a table's records one at a time. Raises KeyError if missing."""
+        t = self.table(name, db_idx)
+        if t is None:
+            raise KeyError(f"Table '{name.upper()}' not found")
+        return iter_records(self.data, t, lazy=lazy, columns=columns,
+                            where=where)
+
+    def records(self, name, db_idx=None, lazy=False, columns=None, where=None,
+                cache=None):
+        """Read all active records of a table. Raises KeyError if missing.
+
+        With a TableCache, fully decoded results come from (and go into)
+        the cache; they are shared and must not be modified.
+        """
+        t = self.table(name, db_idx)
+        if t is None:
+            raise KeyError(f"Table '{name.upper()}' not found")
+        if cache is not None and not lazy:
+            return cache.records(self.data, t, columns=columns, where=where)
+        return read_records(self.data, t, lazy=lazy, columns=columns,
+                            where=where)
+
+    def columns(self, name, db_idx=None, columns=None, cache=None):
+        """Decode a table into NumPy columns (see read_columns), optionally
+        through a TableCache. Raises KeyError if missing."""
+        t = self.table(name, db_idx)
+        if t is None:
+            raise KeyError(f"Table '{name.upper()}' not found")
+        if cache is not None:
+            return cache.columns(self.data, t, columns=columns)
+        return read_columns(self.data, t, columns=columns)
+
+    def write_records(self, name, updates, db_idx=None):
+        """Patch records of a table in place (see write_records). The file
+        must have been opened with writable=True; call flush() to save."""
+        t = self.table(name, db_idx)
+        if t is None:
+            raise KeyError(f"Table '{name.upper()}' not found")
+        return write_records(self.data, t, updates)
+
+    def append_records(self, name, records, db_idx=None):
+        """Append records to a table (see append_records). The file must
+        have been opened with writable=True; call flush() to save."""
+        t = self.table(name, db_idx)
+        if t is None:
+            raise KeyError(f"Table '{name.upper()}' not found")
+        return append_records(self.data, t, records)
+
+    def delete_records(self, name, indices, db_idx=None):
+        """Delete records from a table (see delete_records). The file must
+        have been opened with writable=True; call flush() to save."""
+        t = self.table(name, db_idx)
+        if t is None:
+            raise KeyError(f"Table '{name.upper()}' not found")
+        return delete_records(self.data, t, indices)
+
+    def update_columns(self, name, assignments, where=None, clamp=False,
+                       db_idx=None):
+        """Vectorized bulk update of a table (see update_columns). The file
+        must have been opened with writable=True; call flush() to save."""
+        t = self.table(name, db_idx)
+        if t is None:
+            raise KeyError(f"Table '{name.upper()}' not found")
+        return update_columns(self.data, t, assignments, where=where,
+                              clamp=clamp)
+
+
+def reload_save(old, data, path=None):
+    """Open data as a new version of the save old.
+
+    Tables whose header and field definitions are byte-identical, at the
+    same offset, keep old's parsed table_info; the rest are parsed when
+    first accessed. old is left untouched, so readers still using it are
+    unaffected. Returns the new SaveFile.
+    """
+    tdb_offsets, timestamp = find_tdbs(data)
+    dbs = []
+    for db_idx, tdb in enumerate(tdb_offsets):
+        db = read_toc(data, tdb)
+        known = {}
+        if db_idx < len(old.tdb_offsets) and old.tdb_offsets[db_idx] == tdb:
+            tables = old.dbs[db_idx]["tables"]
+            known = tables.loaded() if isinstance(tables, LazyTables) else tables
+        reuse = {}
+        for name, t in known.items():
+            off = t.get("table_offset")
+            if off is None or db["toc"].get(name) != off:
+                continue
+            # Bytes 0-4 are the checksum of the previous table's records
+            end = t["record_data_offset"]
+            if bytes(old.data[off + 4 : end]) == bytes(data[off + 4 : end]):
+                reuse[name] = t
+        db["tables"] = LazyTables(data, db["toc"], reuse)
+        dbs.append(db)
+    return SaveFile(data, tdb_offsets, timestamp, path=path, dbs=dbs)
+
+
+def _parsed_snapshot(save):
+    """A copy of save holding only the tables parsed so far, for
+    reload_save to read in another thread while save itself keeps parsing
+    tables on first access."""
+    dbs = []
+    for db in save.dbs:
+        tables = db["tables"]
+        if isinstance(tables, LazyTables):
+            tables = tables.loaded()
+        dbs.append(dict(db, tables=dict(tables)))
+    return SaveFile(save.data, save.tdb_offsets, save.timestamp,
+                    path=save.path, dbs=dbs)
+
+
+# MC02 header: magic, total file size, sub-header size, payload size, then
+# three check words (0x10-0x1B) whose algorithm is unknown. The sub-header
+# at 0x1C starts with the file size minus 0x1C.
+_MC02_HEADER = struct.Struct(">4s I I I")
+
+
+def _validate_tdb(data, tdb):
+    """Problems in the TDB at offset tdb (see validate_save)."""
+    avail = len(data)
+    if tdb + 24 > avail:
+        return [("truncated", "header is cut off")]
+    problems = []
+    db_size = struct.unpack_from(">I", data, tdb + 8)[0]
+    table_count = struct.unpack_from(">I", data, tdb + 16)[0]
+    end = tdb + db_size
+    if end > avail:
+        problems.append(("truncated", f"db_size is {db_size} bytes but only "
+                                      f"{avail - tdb} are present"))
+    limit = min(end, avail)
+    toc_end = tdb + 24 + table_count * 8
+    if toc_end > limit:
+        problems.append(("truncated" if toc_end > avail else "structure",
+                         f"table of contents ({table_count} tables) runs past "
+                         f"the database"))
+        return problems
+
+    db = read_toc(data, tdb)
+    tables = sorted((off, name) for name, off in db["toc"].items())
+    region_end = toc_end
+    for k, (off, name) in enumerate(tables):
+        nxt = tables[k + 1][0] if k + 1 < len(tables) else end - 4
+        if off < region_end:
+            problems.append(("structure", f"{name}: overlaps the data before it"))
+        if off + 40 > limit or off + 40 + data[off + 28] * 16 > limit:
+            problems.append(("truncated", f"{name}: table header is cut off"))
+            return problems
+        t = parse_table(data, off, name)
+        slots = allocated_slots(t)
+        region_end = t["record_data_offset"] + slots * t["record_length"]
+        if region_end > nxt:
+            problems.append(("structure", f"{name}: {slots} records of "
+                                          f"{t['record_length']} bytes overrun "
+                                          f"the next table"))
+        if region_end > avail:
+            problems.append(("truncated", f"{name}: records are cut off"))
+            return problems
+        if t["record_count"] > slots:
+            problems.append(("structure", f"{name}: {t['record_count']} records "
+                                          f"exceed the {slots} stored slots"))
+        bad = [f["name"] for f in t["fields"]
+               if f["bit_offset"] + f["bits"] > t["record_length"] * 8]
+        if bad:
+            problems.append(("structure", f"{name}: field(s) past the end of "
+                                          f"the record: {', '.join(bad)}"))
+    if region_end + 4 != end:
+        problems.append(("structure", f"db_size is {db_size} but the tables "
+                                      f"end at {region_end + 4 - tdb}"))
+
+    if end <= avail:
+        for label, crc_off, start, stop in tdb_checksums(db):
+            stored = struct.unpack_from(">I", data, crc_off)[0]
+            computed = tdb_crc(data[start:stop])
+            if stored != computed:
+                problems.append(("checksum", f"{label}: stored 0x{stored:08X}, "
+                                             f"computed 0x{computed:08X}"))
+    return problems
+
+
+def validate_save(data):
+    """Check a save's container sizes, TDB structure and checksums.
+
+    Never raises on bad input. Returns a list of (kind, message) problems,
+    kind being "truncated", "structure" or "checksum"; an empty list means
+    the file is intact. Bounds are checked before anything is parsed, and
+    the checksummed ranges (see tdb_checksums) cover each database once,
+    front to back. The MC02 check words at 0x10-0x1B are not verified;
+    their algorithm is unknown (they don't cover the TDB data).
+    """
+    avail = len(data)
+    problems = []
+    if data[:4] == b"MC02":
+        if avail < 0x20:
+            return [("truncated", f"MC02 header is cut off ({avail} bytes)")]
+        _, total, sub_hdr_size, payload = _MC02_HEADER.unpack_from(data)
+        if total != avail:
+            problems.append(("truncated" if avail < total else "structure",
+                             f"MC02 size is {total} bytes, file has {avail}"))
+        if payload != total - (sub_hdr_size + 0x1C):
+            problems.append(("structure", f"MC02 payload size {payload} doesn't "
+                                          f"match size {total}"))
+        if struct.unpack_from(">I", data, 0x1C)[0] != total - 0x1C:
+            problems.append(("structure", "MC02 sub-header size doesn't match "
+                                          "the file size"))
+    elif data[:2] != b"DB":
+        return [("structure", f"Unknown file format (magic: {bytes(data[:4])!r})")]
+
+    try:
+        tdb_offsets, _ = find_tdbs(data)
+    except (ValueError, struct.error) as e:
+        return problems + [("structure", str(e))]
+    if not tdb_offsets:
+        problems.append(("structure", "No TDB databases found"))
+    for db_idx, off in enumerate(tdb_offsets):
+        problems.extend((kind, f"DB {db_idx}: {msg}")
+                        for kind, msg in _validate_tdb(data, off))
+    return problems
+
+
+def _parse_query_args(args):
+    """Split --columns and parse --where; exits with an error message."""
+    columns = None
+    if args.columns:
+        columns = [c.strip() for c in args.columns.split(",") if c.strip()]
+    where = None
+    if args.where:
+        try:
+            where = parse_where(args.where)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    return columns, where
+
+
+def _table_query(table_info, columns, where):
+    """Projected fields for one table of a multi-table export, or None.
+
+    Requested columns the table doesn't have are dropped; the table is
+    skipped if it has none of them or lacks a field used by the filter.
+    """
+    if columns is not None:
+        columns = [c for c in columns if resolve_field(table_info, c)]
+        if not columns:
+            return None
+    if where and any(resolve_field(table_info, n) is None for n, _, _ in where):
+        return None
+    return select_fields(table_info, columns)
+
+
+def cmd_list(args):
+    """List all tables in a file."""
+    save = SaveFile.open(args.file, cache_dir=args.cache_dir)
+
+    if save.timestamp:
+        print(f"Timestamp: {save.timestamp}")
+    print(f"Found {len(save.dbs)} TDB database(s)\n")
+
+    for db_idx, db in enumerate(save.dbs):
+        tdb_off = db["tdb_offset"]
+        print(
+            f"DB {db_idx}: version={db['version']}, "
+            f"tables={db['table_count']}, "
+            f"offset=0x{tdb_off:X}"
+        )
+        print(f"  {'Table':<12} {'Records':>8} {'Capacity':>9} {'Fields':>7} "
+              f"{'RecLen':>7}")
+        print(f"  {'─'*12} {'─'*8} {'─'*9} {'─'*7} {'─'*7}")
+        for name in sorted(db["tables"]):
+            t = db["tables"][name]
+            if "error" in t:
+                print(f"  {name:<12} ERROR: {t['error']}")
+            else:
+                print(
+                    f"  {name:<12} {t['record_count']:>8} "
+                    f"{t['capacity']:>9} {t['field_count']:>7} "
+                    f"{t['record_length']:>7}"
+                )
+        print()
+
+
+def cmd_dump(args):
+    """Dump a single table as CSV."""
+    save = SaveFile.open(args.file, cache_dir=args.cache_dir)
+
+    if args.db is not None and args.db >= len(save.dbs):
+        print(
+            f"Error: DB index {args.db} out of range "
+            f"(file has {len(save.dbs)} DBs)",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    table_info = save.table(args.table, args.db)
+
+    if table_info is None:
+        print(f"Error: Table '{args.table.upper()}' not found", file=sys.stderr)
+        for db_idx, db in enumerate(save.dbs):
+            tables = sorted(db["tables"].keys())
+            print(f"  DB {db_idx}: {', '.join(tables)}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.schema:
+        print(format_schema(table_info))
+        return
+
+    columns, where = _parse_query_args(args)
+    try:
+        fields = select_fields(table_info, columns)
+        records = iter_records(save.data, table_info, columns=columns,
+                               where=where)
+    except (KeyError, ValueError) as e:
+        print(f"Error: {e.args[0]}", file=sys.stderr)
+        sys.exit(1)
+
+    use_friendly = not args.raw
+    tname = args.table.upper()
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            count = records_to_csv(records, fields, f,
+                                   friendly_names=use_friendly, table_name=tname)
+        print(f"Wrote {count} records to {args.output}", file=sys.stderr)
+    else:
+        # Stream rows straight to stdout; stop quietly if the reader
+        # (e.g. `head`) goes away.
+        try:
+            records_to_csv(records, fields, sys.stdout,
+                           friendly_names=use_friendly, table_name=tname)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            sys.exit(1)
+
+
+# Map TDB field types to SQLite type affinities
+SQLITE_TYPES = {
+    FIELD_STRING: "TEXT",
+    FIELD_BINARY: "TEXT",
+    FIELD_SINT: "INTEGER",
+    FIELD_UINT: "INTEGER",
+    FIELD_FLOAT: "REAL",
+}
+
+
+# Field labels (from TABLE_FIELD_NAMES / FIELD_MAPPINGS) that mark join keys
+_INDEX_LABELS = {
+    "PlayerId", "TeamId", "CoachId", "RecordIndex",
+    "player_id", "team_id", "coach_id",
+}
+
+# Raw field codes indexed by SQLite exports: player/team/recruit/coach IDs
+# plus the schedule week (MNGS) and dynasty year (RYES) columns.
+INDEX_FIELD_CODES = {"MNGS", "RYES"} | {
+    code
+    for mapping in list(TABLE_FIELD_NAMES.values()) + list(FIELD_MAPPINGS.values())
+    for code, label in mapping.items()
+    if label in _INDEX_LABELS
+}
+
+
+def sqlite_index_columns(table_name, sorted_fields, col_names):
+    """Exported column names of the table's key fields worth indexing.
+
+    A code from INDEX_FIELD_CODES is skipped when this table labels it as
+    something else (TGWP is TeamId in PLAY but Weight in RCPT).
+    """
+    labels = [TABLE_FIELD_NAMES.get(table_name, {}),
+              FIELD_MAPPINGS.get(table_name, {})]
+    result = []
+    for f, c in zip(sorted_fields, col_names):
+        code = f["name"]
+        if code not in INDEX_FIELD_CODES:
+            continue
+        own = [m[code] for m in labels if code in m]
+        if code in ("MNGS", "RYES") or not own or \
+                any(label in _INDEX_LABELS for label in own):
+            result.append(c)
+    return result
+
+
+def _create_indexes(conn, table_name, col_names):
+    for c in col_names:
+        conn.execute(
+            f'CREATE INDEX "idx_{table_name}_{c}" ON "{table_name}" ("{c}")'
+        )
+
+
+def _bulk_sqlite_connect(path):
+    """Open a SQLite database for a one-shot bulk load.
+
+    Journaling and synchronous writes are turned off and a single explicit
+    transaction is opened; callers COMMIT when done. Only suitable for
+    output files that are rebuilt from scratch.
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("BEGIN")
+    return conn
+
+
+def sqlite_columns(table_name, fields, friendly_names=True):
+    """Return (sorted_fields, column_names) for a table export.
+
+    Fields are ordered by bit offset and names are made unique
+    case-insensitively (SQLite identifiers are case-insensitive, so e.g.
+    "tpst" and "tPst" collide).
+    """
+    sorted_fields = sorted(fields, key=lambda f: f["bit_offset"])
+    raw_names = [f["name"] for f in sorted_fields]
+
+    if friendly_names:
+        name_map = TABLE_FIELD_NAMES.get(table_name, FIELD_NAMES)
+        col_names = [name_map.get(n, n) for n in raw_names]
+    else:
+        col_names = list(raw_names)
+
+    seen = {}
+    for i, c in enumerate(col_names):
+        key = c.lower()
+        if key in seen:
+            seen[key] += 1
+            col_names[i] = f"{c}_{seen[key]}"
+        else:
+            seen[key] = 0
+    return sorted_fields, col_names
+
+
+def export_tables(save, db_idx=None, tables=None, columns=None, where=None):
+    """Select the tables a multi-table export writes.
+
+    Yields (output_name, table_name, table_info, fields) for every non-empty
+    table, optionally limited to the given table names. output_name carries
+    a "db<N>_" prefix for files with more than one database. See
+    _table_query for how columns/where narrow the selection.
+    """
+    wanted = {n.upper() for n in tables} if tables else None
+    for idx, name, t in save.tables(db_idx):
+        if "error" in t or t["record_count"] == 0:
+            continue
+        if wanted is not None and name not in wanted:
+            continue
+        fields = _table_query(t, columns, where)
+        if fields is None:
+            continue
+        prefix = f"db{idx}_" if len(save.dbs) > 1 else ""
+        yield f"{prefix}{name}", name, t, fields
+
+
+def _export_records(data, name, t, fields, columns, where):
+    projection = [f["name"] for f in fields] if columns else None
+    try:
+        return iter_records(data, t, columns=projection, where=where)
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}") from None
+
+
+# Records per decoded batch handed to the SQLite writer by parallel exports
+EXPORT_BATCH_RECORDS = 4096
+
+# Save opened by each export worker process (see _init_export_worker)
+_WORKER_DATA = None
+
+
+def _init_export_worker(path):
+    """Map the save once per worker; the OS shares the pages between them."""
+    global _WORKER_DATA
+    _WORKER_DATA = read_save(path, use_mmap=True)
+
+
+def _export_pool(save, jobs):
+    if save.path is None:
+        raise ValueError("Parallel export needs a save opened from a file")
+    return ProcessPoolExecutor(max_workers=jobs,
+                               initializer=_init_export_worker,
+                               initargs=(save.path,))
+
+
+def _map_bounded(pool, fn, items, window):
+    """Like pool.map, but with at most window tasks submitted and not yet
+    consumed, so finished results can't pile up ahead of a slow reader."""
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def _table_slice(t, start, stop):
+    """A table_info covering only records [start, stop)."""
+    return dict(t, record_data_offset=t["record_data_offset"] +
+                start * t["record_length"], record_count=stop - start)
+
+
+def _csv_task(task):
+    name, t, fields, columns, where, fpath, friendly_names = task
+    records = _export_records(_WORKER_DATA, name, t, fields, columns, where)
+    with open(fpath, "w", newline="") as f:
+        records_to_csv(records, fields, f,
+                       friendly_names=friendly_names, table_name=name)
+    return fpath
+
+
+def _rows_task(task):
+    name, t, fields, columns, where, raw_names = task
+    records = _export_records(_WORKER_DATA, name, t, fields, columns, where)
+    return [[rec.get(n, "") for n in raw_names] for rec in records]
+
+
+def export_csv(save, outdir, db_idx=None, friendly_names=True, tables=None,
+               columns=None, where=None, jobs=1):
+    """Write one CSV per table into outdir. Returns the number of files.
+
+    With jobs > 1, tables are decoded and written by that many worker
+    processes, each mapping the save file.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    total_files = 0
+    tasks = []
+    for out_name, name, t, fields in export_tables(save, db_idx, tables,
+                                                   columns, where):
+        # Also validates the filter before any work is handed to workers
+        records = _export_records(save.data, name, t, fields, columns, where)
+        fpath = os.path.join(outdir, f"{out_name}.csv")
+        total_files += 1
+        if jobs > 1:
+            tasks.append((name, t, fields, columns, where, fpath,
+                          friendly_names))
+            continue
+        with open(fpath, "w", newline="") as f:
+            records_to_csv(records, fields, f,
+                           friendly_names=friendly_names, table_name=name)
+
+    if tasks:
+        # Largest tables first so one big table doesn't finish last
+        tasks.sort(key=lambda task: -task[1]["record_count"] * len(task[2]))
+        with _export_pool(save, jobs) as pool:
+            list(pool.map(_csv_task, tasks))
+    return total_files
+
+
+# Bookkeeping table in SQLite exports: table name -> table_digest of the
+# data it was built from, so --incremental can skip unchanged tables.
+SQLITE_SYNC_TABLE = "_tdb_sync"
+
+
+def export_sqlite(save, outpath, db_idx=None, friendly_names=True,
+                  tables=None, columns=None, where=None, jobs=1, indexes=True,
+                  incremental=False):
+    """Write all tables into a SQLite database. Returns the number of tables
+    written.
+
+    By default the file is rebuilt from scratch: it is bulk-loaded in one
+    transaction without journaling, rows are streamed into executemany, and
+    (unless indexes=False) key columns (see INDEX_FIELD_CODES) are indexed
+    once the data is in.
+
+    Each table's digest is recorded in SQLITE_SYNC_TABLE. With
+    incremental=True the existing file is updated in place instead: only
+    tables whose digest (record bytes, schema and export options) changed
+    are dropped and re-imported, and tables no longer exported are removed.
+
+    With jobs > 1, tables are split into batches of EXPORT_BATCH_RECORDS
+    records that worker processes decode from the memory-mapped save; this
+    process is the single writer and inserts the batches as they arrive.
+    """
+    if incremental:
+        conn = sqlite3.connect(outpath, isolation_level=None)
+        conn.execute("BEGIN")
+    else:
+        # Remove existing file to avoid stale data
+        if os.path.exists(outpath):
+            os.remove(outpath)
+        conn = _bulk_sqlite_connect(outpath)
+
+    options = repr((friendly_names, columns, where, indexes))
+    total_tables = 0
+    tasks = []
+    to_index = []
+    try:
+        conn.execute(
+            f'CREATE TABLE IF NOT EXISTS "{SQLITE_SYNC_TABLE}" '
+            f'(table_name TEXT PRIMARY KEY, digest TEXT)'
+        )
+        synced = dict(conn.execute(f'SELECT * FROM "{SQLITE_SYNC_TABLE}"'))
+        exported = set()
+        for table_name, name, t, fields in export_tables(save, db_idx, tables,
+                                                         columns, where):
+            exported.add(table_name)
+            digest = table_digest(save.data, t, options)
+            if incremental and synced.get(table_name) == digest:
+                continue
+            conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+            conn.execute(
+                f'INSERT OR REPLACE INTO "{SQLITE_SYNC_TABLE}" VALUES (?, ?)',
+                (table_name, digest),
+            )
+
+            records = _export_records(save.data, name, t, fields, columns,
+                                      where)
+            sorted_fields, col_names = sqlite_columns(name, fields,
+                                                      friendly_names)
+            raw_names = [f["name"] for f in sorted_fields]
+
+            col_defs = ", ".join(
+                f'"{c}" {SQLITE_TYPES.get(sf["type"], "TEXT")}'
+                for c, sf in zip(col_names, sorted_fields)
+            )
+            conn.execute(f'CREATE TABLE "{table_name}" ({col_defs})')
+
+            placeholders = ", ".join("?" for _ in col_names)
+            insert = f'INSERT INTO "{table_name}" VALUES ({placeholders})'
+            total_tables += 1
+            if indexes:
+                to_index.append(
+                    (table_name,
+                     sqlite_index_columns(name, sorted_fields, col_names))
+                )
+            if jobs > 1:
+                count = t["record_count"]
+                for start in range(0, count, EXPORT_BATCH_RECORDS):
+                    stop = min(start + EXPORT_BATCH_RECORDS, count)
+                    tasks.append((insert, (name, _table_slice(t, start, stop),
+                                           fields, columns, where, raw_names)))
+                continue
+
+            conn.executemany(
+                insert,
+                ([rec.get(n, "") for n in raw_names] for rec in records),
+            )
+
+        if tasks:
+            with _export_pool(save, jobs) as pool:
+                # Results come back in submission order, so rows keep their
+                # record order while workers decode ahead of the writer.
+                batches = _map_bounded(pool, _rows_task,
+                                       [task for _, task in tasks], jobs * 2)
+                for (insert, _), rows in zip(tasks, batches):
+                    conn.executemany(insert, rows)
+
+        for table_name in set(synced) - exported:
+            conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+            conn.execute(
+                f'DELETE FROM "{SQLITE_SYNC_TABLE}" WHERE table_name = ?',
+                (table_name,),
+            )
+
+        for table_name, index_columns in to_index:
+            _create_indexes(conn, table_name, index_columns)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return total_tables
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet output requires pyarrow "
+                          "(pip install pyarrow)") from None
+    return pyarrow, pyarrow.parquet
+
+
+def write_parquet(path, col_names, rows):
+    """Write row lists as a Parquet file (requires pyarrow)."""
+    pa, pq = _require_pyarrow()
+    columns = {c: [r[i] for r in rows] for i, c in enumerate(col_names)}
+    pq.write_table(pa.table(columns), path)
+
+
+def export_parquet(save, outdir, db_idx=None, friendly_names=True,
+                   tables=None, columns=None, where=None):
+    """Write one Parquet file per table into outdir. Returns the file count."""
+    _require_pyarrow()
+    os.makedirs(outdir, exist_ok=True)
+    total_files = 0
+    for out_name, name, t, fields in export_tables(save, db_idx, tables,
+                                                   columns, where):
+        records = _export_records(save.data, name, t, fields, columns, where)
+        sorted_fields, col_names = sqlite_columns(name, fields, friendly_names)
+        raw_names = [f["name"] for f in sorted_fields]
+        rows = [[rec.get(n, "") for n in raw_names] for rec in records]
+        write_parquet(os.path.join(outdir, f"{out_name}.parquet"),
+                      col_names, rows)
+        total_files += 1
+    return total_files
+
+
+def cmd_export(args):
+    """Export all tables (or tables with data) to a directory of CSV files."""
+    save = SaveFile.open(args.file)
+    outdir = args.output or "export"
+    columns, where = _parse_query_args(args)
+    try:
+        total_files = export_csv(save, outdir, args.db,
+                                 friendly_names=not args.raw,
+                                 columns=columns, where=where, jobs=args.jobs)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Exported {total_files} tables to {outdir}/", file=sys.stderr)
+
+
+def cmd_sqlite(args):
+    """Export all tables to a single SQLite database file."""
+    save = SaveFile.open(args.file)
+    outpath = args.output or os.path.splitext(os.path.basename(args.file))[0] + ".db"
+    columns, where = _parse_query_args(args)
+    try:
+        total_tables = export_sqlite(save, outpath, args.db,
+                                     friendly_names=not args.raw,
+                                     columns=columns, where=where,
+                                     jobs=args.jobs,
+                                     indexes=not args.no_indexes,
+                                     incremental=args.incremental)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.incremental:
+        print(f"Updated {total_tables} changed tables in {outpath}",
+              file=sys.stderr)
+    else:
+        print(f"Exported {total_tables} tables to {outpath}", file=sys.stderr)
+
+
+BATCH_FORMATS = ("csv", "sqlite", "parquet")
+
+
+def expand_inputs(patterns):
+    """Expand files, directories and glob patterns into a list of files.
+
+    Directories contribute the regular files directly inside them.
+    Duplicates are dropped; order follows the arguments.
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, n) for n in sorted(os.listdir(pattern))]
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+        else:
+            matches = [pattern]
+        for m in matches:
+            if os.path.isfile(m) and m not in paths:
+                paths.append(m)
+            elif not os.path.exists(m):
+                print(f"Warning: {m} not found", file=sys.stderr)
+    return paths
+
+
+def _output_stems(paths):
+    """Unique per-file output names derived from the input basenames."""
+    stems = []
+    seen = {}
+    for path in paths:
+        stem = os.path.basename(path)
+        seen[stem] = seen.get(stem, 0) + 1
+        stems.append(stem if seen[stem] == 1 else f"{stem}_{seen[stem]}")
+    return stems
+
+
+def _batch_job(job):
+    """Process one save file (runs in a worker process).
+
+    Returns (path, size, result, error). In merge mode result is a list of
+    (output_name, col_names, col_types, key_columns, rows) for the parent;
+    otherwise the file's outputs are written here and result is the number
+    of tables exported.
+    """
+    path, stem, opts = job
+    size = os.path.getsize(path)
+    try:
+        data = read_save(path, use_mmap=True)
+        if opts["validate"]:
+            problems = validate_save(data)
+            if problems:
+                raise ValueError("; ".join(msg for _, msg in problems))
+        save = SaveFile(data, path=path)
+        if not save.dbs:
+            raise ValueError("No TDB databases found")
+        select = dict(db_idx=opts["db"], tables=opts["tables"],
+                      columns=opts["columns"], where=opts["where"])
+        friendly = opts["friendly"]
+
+        if opts["merge"]:
+            result = []
+            for out_name, name, t, fields in export_tables(save, **select):
+                records = _export_records(save.data, name, t, fields,
+                                          opts["columns"], opts["where"])
+                sorted_fields, col_names = sqlite_columns(name, fields, friendly)
+                raw_names = [f["name"] for f in sorted_fields]
+                col_types = [SQLITE_TYPES.get(f["type"], "TEXT")
+                             for f in sorted_fields]
+                keys = sqlite_index_columns(name, sorted_fields, col_names)
+                rows = [[rec.get(n, "") for n in raw_names] for rec in records]
+                result.append((out_name, col_names, col_types, keys, rows))
+            return path, size, result, None
+
+        dest = os.path.join(opts["outdir"], stem)
+        if opts["format"] == "csv":
+            result = export_csv(save, dest, friendly_names=friendly, **select)
+        elif opts["format"] == "sqlite":
+            result = export_sqlite(save, dest + ".db", friendly_names=friendly,
+                                   **select)
+        else:
+            result = export_parquet(save, dest, friendly_names=friendly,
+                                    **select)
+        return path, size, result, None
+    except Exception as e:
+        return path, size, None, str(e)
+
+
+class _MergedOutput:
+    """Collects per-file table rows into one output per table, tagged with
+    a SourceFile column."""
+
+    def __init__(self, fmt, outdir):
+        self.fmt = fmt
+        self.outdir = outdir
+        self.columns = {}  # output_name -> column names written so far
+        self.keys = {}  # output_name -> key columns to index (SQLite)
+        self.writers = {}
+        self.files = []
+        self.parquet_parts = {}
+        self.conn = None
+        if fmt == "sqlite":
+            path = os.path.join(outdir, "merged.db")
+            if os.path.exists(path):
+                os.remove(path)
+            self.conn = _bulk_sqlite_connect(path)
+
+    def add(self, source, out_name, col_names, col_types, keys, rows):
+        if self.fmt == "csv":
+            self._add_csv(source, out_name, col_names, rows)
+        elif self.fmt == "sqlite":
+            self.keys.setdefault(out_name, {"SourceFile": None}).update(
+                dict.fromkeys(keys)
+            )
+            self._add_sqlite(source, out_name, col_names, col_types, rows)
+        else:
+            pa, _ = _require_pyarrow()
+            columns = {"SourceFile": [source] * len(rows)}
+            for i, c in enumerate(col_names):
+                columns[c] = [r[i] for r in rows]
+            self.parquet_parts.setdefault(out_name, []).append(pa.table(columns))
+
+    def _add_csv(self, source, out_name, col_names, rows):
+        header = self.columns.get(out_name)
+        if header is None:
+            f = open(os.path.join(self.outdir, f"{out_name}.csv"), "w",
+                     newline="")
+            self.files.append(f)
+            writer = csv.writer(f)
+            writer.writerow(["SourceFile"] + col_names)
+            self.columns[out_name] = header = col_names
+            self.writers[out_name] = writer
+        writer = self.writers[out_name]
+        if col_names == header:
+            for r in rows:
+                writer.writerow([source] + r)
+            return
+        # Different schema than the first file: align by column name
+        extra = set(col_names) - set(header)
+        if extra:
+            print(f"Warning: {source}: {out_name}: dropping columns not in "
+                  f"the first file: {', '.join(sorted(extra))}", file=sys.stderr)
+        pos = {c: i for i, c in enumerate(col_names)}
+        for r in rows:
+            writer.writerow([source] + [r[pos[c]] if c in pos else ""
+                                        for c in header])
+
+    def _add_sqlite(self, source, out_name, col_names, col_types, rows):
+        known = self.columns.get(out_name)
+        if known is None:
+            col_defs = ", ".join(
+                ['"SourceFile" TEXT'] +
+                [f'"{c}" {ct}' for c, ct in zip(col_names, col_types)]
+            )
+            self.conn.execute(f'CREATE TABLE "{out_name}" ({col_defs})')
+            self.columns[out_name] = known = list(col_names)
+        else:
+            # Files with extra fields widen the table
+            lower = {c.lower() for c in known}
+            for c, ct in zip(col_names, col_types):
+                if c.lower() not in lower:
+                    self.conn.execute(
+                        f'ALTER TABLE "{out_name}" ADD COLUMN "{c}" {ct}'
+                    )
+                    known.append(c)
+                    lower.add(c.lower())
+        cols = ", ".join(f'"{c}"' for c in ["SourceFile"] + col_names)
+        placeholders = ", ".join("?" for _ in range(len(col_names) + 1))
+        self.conn.executemany(
+            f'INSERT INTO "{out_name}" ({cols}) VALUES ({placeholders})',
+            ([source] + r for r in rows),
+        )
+
+    def close(self):
+        for f in self.files:
+            f.close()
+        if self.conn is not None:
+            for out_name, keys in self.keys.items():
+                _create_indexes(self.conn, out_name, keys)
+            self.conn.execute("COMMIT")
+            self.conn.close()
+        if self.parquet_parts:
+            pa, pq = _require_pyarrow()
+            for out_name, parts in self.parquet_parts.items():
+                try:
+                    table = pa.concat_tables(parts, promote_options="default")
+                except TypeError:  # pyarrow < 14
+                    table = pa.concat_tables(parts, promote=True)
+                pq.write_table(
+                    table, os.path.join(self.outdir, f"{out_name}.parquet")
+                )
+        return len(self.columns) or len(self.parquet_parts)
+
+
+def cmd_batch(args):
+    """Export many save files in parallel worker processes."""
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("Error: No input files", file=sys.stderr)
+        sys.exit(1)
+    if args.format == "parquet":
+        try:
+            _require_pyarrow()
+        except ImportError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    outdir = args.output or "batch"
+    os.makedirs(outdir, exist_ok=True)
+    columns, where = _parse_query_args(args)
+    tables = [t.strip() for t in args.tables.split(",")] if args.tables else None
+    opts = {
+        "outdir": outdir,
+        "format": args.format,
+        "merge": args.merge,
+        "db": args.db,
+        "tables": tables,
+        "columns": columns,
+        "where": where,
+        "friendly": not args.raw,
+        "validate": args.validate,
+    }
+    jobs = [(p, stem, opts) for p, stem in zip(paths, _output_stems(paths))]
+    workers = max(1, min(args.jobs or os.cpu_count() or 1, len(jobs)))
+
+    merged = _MergedOutput(args.format, outdir) if args.merge else None
+    start = time.perf_counter()
+    total_bytes = 0
+    failures = 0
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        results = (_map_bounded(executor, _batch_job, jobs, workers * 2)
+                   if executor else map(_batch_job, jobs))
+        for path, size, result, error in results:
+            total_bytes += size
+            if error is not None:
+                failures += 1
+                print(f"  {path}: ERROR: {error}", file=sys.stderr)
+                continue
+            if merged is not None:
+                for out_name, col_names, col_types, keys, rows in result:
+                    merged.add(path, out_name, col_names, col_types, keys,
+                               rows)
+                result = len(result)
+            print(f"  {path}: {result} table(s)", file=sys.stderr)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if merged is not None:
+            merged.close()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    mb = total_bytes / (1024 * 1024)
+    print(
+        f"Processed {len(paths)} files ({mb:.1f} MB) in {elapsed:.2f}s with "
+        f"{workers} worker(s): {len(paths) / elapsed:.1f} files/s, "
+        f"{mb / elapsed:.1f} MB/s",
+        file=sys.stderr,
+    )
+    if failures:
+        print(f"{failures} file(s) failed", file=sys.stderr)
+        sys.exit(1)
+
+
+# History store: one SQLite file holding many snapshots of a save. Each
+# table keeps a row once for every run of consecutive snapshots it appears
+# unchanged in, tagged with FirstSnapshot/LastSnapshot; "<table>_history"
+# views expand that back to one row per snapshot.
+HISTORY_COLUMNS = ("RowHash", "FirstSnapshot", "LastSnapshot")
+
+
+def open_history(path):
+    """Open (creating if needed) a history store."""
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS "Snapshots" ('
+        '"SnapshotId" INTEGER PRIMARY KEY, "Timestamp" TEXT, '
+        '"Source" TEXT, "Digest" TEXT UNIQUE)'
+    )
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS "SnapshotTables" ('
+        '"SnapshotId" INTEGER, "TableName" TEXT, "Digest" TEXT, '
+        'PRIMARY KEY ("SnapshotId", "TableName"))'
+    )
+    return conn
+
+
+def _history_table(conn, out_name, col_names, col_types, keys):
+    """Create the table and its view on first use, or widen it with any
+    columns this snapshot adds."""
+    known = {
+        row[1].lower() for row in conn.execute(f'PRAGMA table_info("{out_name}")')
+    }
+    if not known:
+        col_defs = ", ".join(
+            [f'"{c}" {ct}' for c, ct in zip(col_names, col_types)] +
+            ['"RowHash" TEXT', '"FirstSnapshot" INTEGER',
+             '"LastSnapshot" INTEGER']
+        )
+        conn.execute(f'CREATE TABLE "{out_name}" ({col_defs})')
+        _create_indexes(conn, out_name, list(keys) + ["LastSnapshot"])
+        conn.execute(
+            f'CREATE VIEW "{out_name}_history" AS SELECT s."SnapshotId", '
+            f's."Timestamp", s."Source", t.* FROM "Snapshots" s '
+            f'JOIN "{out_name}" t ON s."SnapshotId" '
+            f'BETWEEN t."FirstSnapshot" AND t."LastSnapshot"'
+        )
+        return
+    for c, ct in zip(col_names, col_types):
+        if c.lower() not in known:
+            conn.execute(f'ALTER TABLE "{out_name}" ADD COLUMN "{c}" {ct}')
+
+
+def add_snapshot(conn, save, db_idx=None, friendly_names=True, tables=None):
+    """Append a save to a history store opened with open_history.
+
+    Returns (snapshot_id, new_rows, unchanged_rows), or None if this exact
+    file is already stored. Snapshots are chained in timestamp order: rows
+    identical to a row of the latest snapshot extend that row's
+    LastSnapshot instead of being stored again, and tables whose bytes are
+    unchanged are carried over without decoding them. A save older than
+    the latest snapshot would extend the wrong runs, so it raises
+    ValueError.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(save.data)
+    digest = h.hexdigest()
+    if conn.execute('SELECT 1 FROM "Snapshots" WHERE "Digest" = ?',
+                    (digest,)).fetchone():
+        return None
+    prev, latest = conn.execute(
+        'SELECT "SnapshotId", "Timestamp" FROM "Snapshots" '
+        'ORDER BY "Timestamp" DESC, "SnapshotId" DESC LIMIT 1'
+    ).fetchone() or (None, None)
+    if latest and (save.timestamp or "") < latest:
+        raise ValueError(f"saved {save.timestamp}, before the latest "
+                         f"snapshot ({latest})")
+
+    conn.execute("BEGIN")
+    try:
+        sid = conn.execute(
+            'INSERT INTO "Snapshots" ("Timestamp", "Source", "Digest") '
+            'VALUES (?, ?, ?)',
+            (save.timestamp, save.path, digest),
+        ).lastrowid
+        prev_digests = dict(conn.execute(
+            'SELECT "TableName", "Digest" FROM "SnapshotTables" '
+            'WHERE "SnapshotId" = ?', (prev,)
+        ))
+        new_rows = unchanged_rows = 0
+
+        for out_name, name, t, fields in export_tables(save, db_idx, tables):
+            sorted_fields, col_names = sqlite_columns(name, fields,
+                                                      friendly_names)
+            raw_names = [f["name"] for f in sorted_fields]
+            col_types = [SQLITE_TYPES.get(f["type"], "TEXT")
+                         for f in sorted_fields]
+            table_hash = table_digest(save.data, t, repr(col_names))
+            conn.execute('INSERT INTO "SnapshotTables" VALUES (?, ?, ?)',
+                         (sid, out_name, table_hash))
+
+            if prev_digests.get(out_name) == table_hash:
+                unchanged_rows += conn.execute(
+                    f'UPDATE "{out_name}" SET "LastSnapshot" = ? '
+                    f'WHERE "LastSnapshot" = ?', (sid, prev)
+                ).rowcount
+                continue
+
+            _history_table(conn, out_name, col_names, col_types,
+                           sqlite_index_columns(name, sorted_fields, col_names))
+            # Rows still current as of the previous snapshot, by content
+            # hash; a list per hash since a table can hold identical rows.
+            current = {}
+            for rowid, row_hash in conn.execute(
+                f'SELECT rowid, "RowHash" FROM "{out_name}" '
+                f'WHERE "LastSnapshot" = ?', (prev,)
+            ):
+                current.setdefault(row_hash, []).append(rowid)
+
+            salt = repr(col_names)
+            carried = []
+            added = []
+            for rec in iter_records(save.data, t):
+                row = [rec.get(n, "") for n in raw_names]
+                row_hash = hashlib.blake2b(repr((salt, row)).encode(),
+                                           digest_size=16).hexdigest()
+                rowids = current.get(row_hash)
+                if rowids:
+                    carried.append((sid, rowids.pop()))
+                else:
+                    added.append(row + [row_hash, sid, sid])
+
+            conn.executemany(
+                f'UPDATE "{out_name}" SET "LastSnapshot" = ? WHERE rowid = ?',
+                carried,
+            )
+            cols = ", ".join(f'"{c}"' for c in col_names + list(HISTORY_COLUMNS))
+            placeholders = ", ".join("?" for _ in range(len(col_names) + 3))
+            conn.executemany(
+                f'INSERT INTO "{out_name}" ({cols}) VALUES ({placeholders})',
+                added,
+            )
+            new_rows += len(added)
+            unchanged_rows += len(carried)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return sid, new_rows, unchanged_rows
+
+
+def cmd_history(args):
+    """Append save files to a history store, oldest timestamp first."""
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("Error: No input files", file=sys.stderr)
+        sys.exit(1)
+    tables = [t.strip() for t in args.tables.split(",")] if args.tables else None
+
+    # Only the timestamps are needed to order the files; each save is
+    # opened again when its turn comes, so one bad file doesn't stop the rest
+    failures = 0
+    dated = []
+    for path in paths:
+        try:
+            data = read_save(path, use_mmap=True)
+            try:
+                tdb_offsets, timestamp = find_tdbs(data)
+            finally:
+                release_save(data)
+        except (OSError, ValueError) as e:
+            failures += 1
+            print(f"  {path}: ERROR: {e}", file=sys.stderr)
+            continue
+        if not tdb_offsets:
+            failures += 1
+            print(f"  {path}: ERROR: No TDB databases found", file=sys.stderr)
+            continue
+        dated.append((timestamp or "", path))
+    dated.sort(key=lambda d: d[0])
+
+    conn = open_history(args.store)
+    try:
+        for _, path in dated:
+            with SaveFile.open(path, use_mmap=True) as save:
+                try:
+                    result = add_snapshot(conn, save, args.db,
+                                          friendly_names=not args.raw,
+                                          tables=tables)
+                except ValueError as e:
+                    failures += 1
+                    print(f"  {path}: ERROR: {e}", file=sys.stderr)
+                    continue
+            if result is None:
+                print(f"  {path}: already in history", file=sys.stderr)
+                continue
+            sid, new_rows, unchanged_rows = result
+            print(f"  {path}: snapshot {sid} ({save.timestamp}), "
+                  f"{new_rows} new / {unchanged_rows} unchanged rows",
+                  file=sys.stderr)
+    finally:
+        conn.close()
+    if failures:
+        print(f"{failures} file(s) failed", file=sys.stderr)
+        sys.exit(1)
+
+
+# Candidate match keys per table for diffs and CSV imports, most specific
+# first. The first candidate whose fields exist in both tables and are
+# unique in both wins; tables without one are matched by record index.
+DIFF_KEYS = {
+    "PLAY": [("DIGP",)],
+    "RCPT": [("ISRP",)],
+    "TEAM": [("DIGT",)],
+    "COCH": [("DICC",)],
+    "CONT": [("DICC",)],
+    "CONF": [("DIGC",)],
+    "DIVI": [("DIGD",)],
+    "STAD": [("DIGS",)],
+    "CITY": [("DIYC",)],
+    "INJY": [("DIGP",)],
+    "HEIS": [("DIGP",)],
+    "DCHT": [("DIGP", "SOPP")],
+    "SCHD": [("RYES", "TWES", "GTHG", "GTAG"), ("TWES", "GTHG", "GTAG")],
+    # Stats tables: one row per player/team, per season in dynasty files
+    "SOFF": [("DIGP", "RYES"), ("DIGP",)],
+    "SDEF": [("DIGP", "RYES"), ("DIGP",)],
+    "SKIC": [("DIGP", "RYES"), ("DIGP",)],
+    "STST": [("DIGT", "RYES"), ("DIGT",)],
+    "TSSE": [("DIGT", "RYES"), ("DIGT",)],
+}
+
+
+def _unique_key_map(records, key):
+    """Map key values to records, or None if the key isn't unique."""
+    mapping = {}
+    for rec in records:
+        mapping[tuple([rec[c] for c in key])] = rec
+    return mapping if len(mapping) == len(records) else None
+
+
+def same_layout(t1, t2):
+    """True if two tables' records share one binary layout."""
+    return (t1["record_length"] == t2["record_length"] and
+            _schema_key(t1["fields"]) == _schema_key(t2["fields"]))
+
+
+def changed_records(data1, t1, data2, t2):
+    """Indices of records whose raw bytes differ between two tables with
+    the same layout, over the records both tables have."""
+    rec_len = t1["record_length"]
+    off1 = t1["record_data_offset"]
+    off2 = t2["record_data_offset"]
+    count = min(t1["record_count"], t2["record_count"])
+    if table_region(data1, t1)[: count * rec_len] == \
+            table_region(data2, t2)[: count * rec_len]:
+        return []
+    return [
+        i for i in range(count)
+        if data1[off1 + i * rec_len : off1 + (i + 1) * rec_len] !=
+        data2[off2 + i * rec_len : off2 + (i + 1) * rec_len]
+    ]
+
+
+def diff_tables(data1, t1, data2, t2, name):
+    """Compare one table between two saves.
+
+    Tables whose record regions hash the same are reported as identical
+    without decoding anything. Otherwise records are matched on the
+    table's key from DIFF_KEYS (by index if it has none; then only the
+    indices from changed_records are looked at). Matched records whose raw
+    bytes are identical are skipped; only the rest are decoded and
+    compared field by field.
+
+    Returns a dict with 'identical', 'key' (field codes, or None for index
+    matching), 'count1'/'count2', 'changed' as (rec1, rec2,
+    {field: (v1, v2)}), 'added' and 'removed'. Records are lazy Record
+    views.
+    """
+    layout = same_layout(t1, t2)
+    result = {
+        "identical": False,
+        "key": None,
+        "count1": t1["record_count"],
+        "count2": t2["record_count"],
+        "changed": [],
+        "added": [],
+        "removed": [],
+    }
+    if layout and table_digest(data1, t1) == table_digest(data2, t2):
+        result["identical"] = True
+        return result
+
+    recs1 = read_records(data1, t1, lazy=True)
+    recs2 = read_records(data2, t2, lazy=True)
+    codes1 = {f["name"] for f in t1["fields"]}
+    codes2 = {f["name"] for f in t2["fields"]}
+
+    key = None
+    pairs = []
+    added = []
+    removed = []
+    for candidate in DIFF_KEYS.get(name, ()):
+        if not set(candidate) <= codes1 & codes2:
+            continue
+        map1 = _unique_key_map(recs1, candidate)
+        if map1 is None:
+            continue
+        map2 = _unique_key_map(recs2, candidate)
+        if map2 is not None:
+            key = candidate
+            for k, r1 in map1.items():
+                r2 = map2.pop(k, None)
+                if r2 is None:
+                    removed.append(r1)
+                else:
+                    pairs.append((r1, r2))
+            added = list(map2.values())
+            break
+    if key is None:
+        if layout:
+            pairs = [(recs1[i], recs2[i])
+                     for i in changed_records(data1, t1, data2, t2)]
+        else:
+            pairs = list(zip(recs1, recs2))
+        removed = recs1[len(recs2):]
+        added = recs2[len(recs1):]
+
+    field_names = [f["name"] for f in
+                   sorted(t1["fields"], key=lambda f: f["bit_offset"])]
+    field_names += [f["name"] for f in
+                    sorted(t2["fields"], key=lambda f: f["bit_offset"])
+                    if f["name"] not in codes1]
+    decode1 = compile_record_decoder(t1["fields"])
+    decode2 = compile_record_decoder(t2["fields"])
+    changed = []
+    for r1, r2 in pairs:
+        if layout and r1.raw == r2.raw:
+            continue
+        d1, d2 = decode1(r1.raw), decode2(r2.raw)
+        if layout:
+            diffs = {fn: (v1, d2[fn]) for fn, v1 in d1.items() if v1 != d2[fn]}
+        else:
+            diffs = {fn: (d1.get(fn), d2.get(fn)) for fn in field_names
+                     if d1.get(fn) != d2.get(fn)}
+        # v != v only for NaN floats, which are unchanged here
+        for fn, (v1, v2) in list(diffs.items()):
+            if v1 != v1 and v2 != v2:
+                del diffs[fn]
+        if diffs:
+            changed.append((r1, r2, diffs))
+
+    result.update(key=key, changed=changed, added=added, removed=removed)
+    return result
+
+
+def _print_table_diff(target, name, t, result):
+    name_map = TABLE_FIELD_NAMES.get(name, FIELD_NAMES)
+    string_fields = [f["name"] for f in
+                     sorted(t["fields"], key=lambda f: f["bit_offset"])
+                     if f["type"] == FIELD_STRING]
+    key = result["key"]
+    if result["identical"]:
+        how = "identical"
+    elif key:
+        how = "matched by " + ", ".join(name_map.get(c, c) for c in key)
+    else:
+        how = "matched by record index"
+    print(f"Diff: {target} ({result['count1']} vs {result['count2']} records, "
+          f"{how})")
+    changed, added, removed = result["changed"], result["added"], result["removed"]
+    print(f"  Changed: {len(changed)}, Added: {len(added)}, Removed: {len(removed)}")
+
+    if not changed and not added and not removed:
+        print("  No differences found.")
+        return
+
+    # Label records with their string fields and key
+    def rec_label(rec):
+        parts = []
+        for sf in string_fields:
+            v = rec.get(sf, "")
+            if v:
+                parts.append(str(v))
+        label = " | ".join(parts) if parts else "(record)"
+        if key:
+            ids = ", ".join(f"{name_map.get(c, c)}={rec[c]}" for c in key)
+            label += f" [{ids}]"
+        return label
+
+    for rec, _, diffs in changed:
+        print(f"\n  ~ {rec_label(rec)}")
+        for fn, (v1, v2) in sorted(diffs.items()):
+            fn_display = name_map.get(fn, fn)
+            print(f"      {fn_display}: {v1} -> {v2}")
+
+    for rec in added:
+        print(f"\n  + {rec_label(rec)}")
+
+    for rec in removed:
+        print(f"\n  - {rec_label(rec)}")
+
+
+def _summarize_table_diff(data1, t1, data2, t2):
+    """One-line byte-level summary of how a table changed (no decoding)."""
+    count1, count2 = t1["record_count"], t2["record_count"]
+    counts = f"({count1} vs {count2} records)"
+    if not same_layout(t1, t2):
+        return f"schema changed {counts}"
+    if table_digest(data1, t1) == table_digest(data2, t2):
+        return "identical"
+    parts = [f"{len(changed_records(data1, t1, data2, t2))} changed"]
+    if count2 > count1:
+        parts.append(f"{count2 - count1} added")
+    elif count1 > count2:
+        parts.append(f"{count1 - count2} removed")
+    return f"{', '.join(parts)} {counts}"
+
+
+def cmd_diff(args):
+    """Compare a table (or every table with --all) between two files."""
+    if not (args.all or args.summary) and not args.table:
+        print("Error: Give a table name or --all", file=sys.stderr)
+        sys.exit(1)
+    save1 = SaveFile.open(args.file1)
+    save2 = SaveFile.open(args.file2)
 
+    if args.table:
+        target = args.table.upper()
+        t1 = save1.table(target, args.db)
+        t2 = save2.table(target, args.db)
 
-def find_table_in_file(data, tdb_offsets, table_name, db_idx=None):
-    """Find a table by name across TDB databases. Returns (data, table_info)."""
-    target = table_name.upper()
-    if db_idx is not None:
-        indices = [db_idx]
+        if t1 is None:
+            print(f"Error: Table '{target}' not found in {args.file1}", file=sys.stderr)
+            sys.exit(1)
+        if t2 is None:
+            print(f"Error: Table '{target}' not found in {args.file2}", file=sys.stderr)
+            sys.exit(1)
+        targets = [(target, target, t1, t2)]
     else:
-        indices = range(len(tdb_offsets))
+        tables1 = {(idx, name): t for idx, name, t in save1.tables(args.db)}
+        tables2 = {(idx, name): t for idx, name, t in save2.tables(args.db)}
+        multi_db = len(save1.dbs) > 1 or len(save2.dbs) > 1
+        targets = [
+            (f"db{idx} {name}" if multi_db else name, name,
+             tables1.get((idx, name)), tables2.get((idx, name)))
+            for idx, name in sorted(tables1.keys() | tables2.keys())
+        ]
 
-    for idx in indices:
-        db = parse_tdb(data, tdb_offsets[idx])
-        if target in db["tables"]:
-            return data, db["tables"][target]
+    if args.summary:
+        # Record indices are compared by position: no keys, no decoding
+        differing = 0
+        width = max((len(target) for target, *_ in targets), default=0)
+        for target, name, t1, t2 in targets:
+            if t1 is None or t2 is None:
+                status = f"only in {args.file1 if t2 is None else args.file2}"
+            elif "error" in t1 or "error" in t2:
+                status = f"skipped ({t1.get('error') or t2['error']})"
+            else:
+                status = _summarize_table_diff(save1.data, t1, save2.data, t2)
+            if status != "identical":
+                differing += 1
+            print(f"  {target:<{width}}  {status}")
+        print(f"{differing} of {len(targets)} tables differ")
+        return
 
-    return None, None
+    for target, name, t1, t2 in targets:
+        if t1 is None or t2 is None:
+            only = args.file1 if t2 is None else args.file2
+            print(f"Diff: {target} only in {only}\n")
+            continue
+        if "error" in t1 or "error" in t2:
+            print(f"Diff: {target} skipped ({t1.get('error') or t2['error']})\n")
+            continue
+        result = diff_tables(save1.data, t1, save2.data, t2, name)
+        _print_table_diff(target, name, t1, result)
+        if not args.table:
+            print()
 
 
-def cmd_list(args):
-    """List all tables in a file."""
-    data, tdb_offsets, timestamp = load_file(args.file)
+def import_updates(data, table_info, rows, key=None):
+    """Turn CSV rows (dicts, as from csv.DictReader) into write_records
+    updates for a table.
+
+    Records are located by the key columns (raw codes or friendly names;
+    by default the first DIFF_KEYS candidate the CSV has), which must be
+    unique in the table. Other columns are fields to set; empty cells and
+    cells equal to the current value are skipped. Raises KeyError or
+    ValueError on bad input. Returns a list of (record_index, values).
+    """
+    name = table_info["name"]
+    # csv.DictReader files the cells of a long row under None and fills
+    # those missing from a short one with None
+    for line, row in enumerate(rows, start=2):
+        if None in row:
+            raise ValueError(f"line {line}: more cells than header columns")
+        if None in row.values():
+            raise ValueError(f"line {line}: fewer cells than header columns")
+    header = list(rows[0]) if rows else []
+    # CSV exports label unmapped tables' columns with PLAY's names, which
+    # resolve_field doesn't accept; take those headers back as written
+    exported = {}
+    if name not in TABLE_FIELD_NAMES:
+        exported = {FIELD_NAMES[f["name"]]: f for f in table_info["fields"]
+                    if f["name"] in FIELD_NAMES}
+    fields = {}
+    missing = []
+    for c in header:
+        f = resolve_field(table_info, c) or exported.get(c)
+        if f is None:
+            missing.append(c)
+        fields[c] = f
+    if missing:
+        raise KeyError(f"Unknown field(s) in {name}: {', '.join(missing)}")
+    column_of = {f["name"]: c for c, f in fields.items()}
 
-    if timestamp:
-        print(f"Timestamp: {timestamp}")
-    print(f"Found {len(tdb_offsets)} TDB database(s)\n")
+    if key:
+        key_codes = [f["name"] for f in select_fields(table_info, key)]
+        absent = [code for code in key_codes if code not in column_of]
+        if absent:
+            raise ValueError(f"Key column(s) missing from the CSV: "
+                             f"{', '.join(absent)}")
+    else:
+        key_codes = next((list(candidate) for candidate in DIFF_KEYS.get(name, ())
+                          if all(code in column_of for code in candidate)), None)
+        if key_codes is None:
+            raise ValueError(f"No key column for {name} in the CSV; use --key")
+    key_columns = [column_of[code] for code in key_codes]
 
-    for db_idx, tdb_off in enumerate(tdb_offsets):
-        db = parse_tdb(data, tdb_off)
-        print(
-            f"DB {db_idx}: version={db['version']}, "
-            f"tables={db['table_count']}, "
-            f"offset=0x{tdb_off:X}"
-        )
-        print(f"  {'Table':<12} {'Records':>8} {'Capacity':>9} {'Fields':>7} "
-              f"{'RecLen':>7}")
-        print(f"  {'─'*12} {'─'*8} {'─'*9} {'─'*7} {'─'*7}")
-        for name in sorted(db["tables"]):
-            t = db["tables"][name]
-            if "error" in t:
-                print(f"  {name:<12} ERROR: {t['error']}")
-            else:
-                print(
-                    f"  {name:<12} {t['record_count']:>8} "
-                    f"{t['capacity']:>9} {t['field_count']:>7} "
-                    f"{t['record_length']:>7}"
-                )
-        print()
+    records = read_records(data, table_info, lazy=True)
+    index = {}
+    for i, rec in enumerate(records):
+        index[tuple([rec[code] for code in key_codes])] = i
+    if len(index) != len(records):
+        raise ValueError(f"Key {', '.join(key_codes)} is not unique in {name}")
 
+    updates = []
+    for line, row in enumerate(rows, start=2):
+        k = tuple(parse_field_value(fields[c], row[c]) for c in key_columns)
+        i = index.get(k)
+        if i is None:
+            ids = ", ".join(f"{c}={row[c]}" for c in key_columns)
+            raise ValueError(f"line {line}: no {name} record with {ids}")
+        rec = records[i]
+        values = {}
+        for c, text in row.items():
+            if c in key_columns or text == "":
+                continue
+            code = fields[c]["name"]
+            value = parse_field_value(fields[c], text)
+            if value != rec[code]:
+                values[code] = value
+        if values:
+            updates.append((i, values))
+    return updates
 
-def cmd_dump(args):
-    """Dump a single table as CSV."""
-    data, tdb_offsets, timestamp = load_file(args.file)
 
-    if args.db is not None and args.db >= len(tdb_offsets):
-        print(
-            f"Error: DB index {args.db} out of range "
-            f"(file has {len(tdb_offsets)} DBs)",
-            file=sys.stderr,
-        )
+def cmd_import(args):
+    """Apply a CSV of changes to a table, patching the save in place."""
+    with open(args.csv, newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    name = args.table.upper()
+    key = [k.strip() for k in args.key.split(",")] if args.key else None
+    target = args.output or args.file
+    error = None
+    # With -o the save is edited in memory and only written out once the
+    # edit has succeeded
+    with SaveFile.open(args.file, use_mmap=not args.output,
+                       writable=True) as save:
+        t = save.table(name, args.db)
+        if t is None:
+            error = f"Table '{name}' not found in {args.file}"
+        else:
+            try:
+                updates = import_updates(save.data, t, rows, key)
+                written = write_records(save.data, t, updates)
+            except (KeyError, ValueError) as e:
+                error = e.args[0]
+            else:
+                save.flush(args.output)
+    # Reported after the file is closed: nothing has been written
+    if error is not None:
+        print(f"Error: {error}", file=sys.stderr)
         sys.exit(1)
+    print(f"Updated {written} fields in {len(updates)} {name} records of "
+          f"{target}", file=sys.stderr)
 
-    _, table_info = find_table_in_file(data, tdb_offsets, args.table, args.db)
 
-    if table_info is None:
-        print(f"Error: Table '{args.table.upper()}' not found", file=sys.stderr)
-        for db_idx, tdb_off in enumerate(tdb_offsets):
-            db = parse_tdb(data, tdb_off)
-            tables = sorted(db["tables"].keys())
-            print(f"  DB {db_idx}: {', '.join(tables)}", file=sys.stderr)
+def cmd_update(args):
+    """Bulk-update a column across matching records, patching in place."""
+    if np is None:
+        print("Error: update requires numpy (pip install numpy)", file=sys.stderr)
+        sys.exit(1)
+    name = args.table.upper()
+    target = args.output or args.file
+    error = None
+    with SaveFile.open(args.file, use_mmap=not args.output,
+                       writable=True) as save:
+        try:
+            updated = save.update_columns(name, args.set, where=args.where,
+                                          clamp=args.clamp, db_idx=args.db)
+        except (KeyError, ValueError) as e:
+            error = e.args[0]
+        else:
+            save.flush(args.output)
+    if error is not None:
+        print(f"Error: {error}", file=sys.stderr)
         sys.exit(1)
+    print(f"Updated {updated} {name} records of {target}", file=sys.stderr)
 
-    if args.schema:
-        print(format_schema(table_info))
-        return
 
-    records = read_records(data, table_info)
-    use_friendly = not args.raw
-    tname = args.table.upper()
-    if args.output:
-        with open(args.output, "w", newline="") as f:
-            records_to_csv(records, table_info["fields"], f,
-                           friendly_names=use_friendly, table_name=tname)
-        print(f"Wrote {len(records)} records to {args.output}", file=sys.stderr)
-    else:
-        sys.stdout.write(
-            records_to_csv(records, table_info["fields"],
-                           friendly_names=use_friendly, table_name=tname)
-        )
+def cmd_validate(args):
+    """Check save files' structure and checksums, optionally fixing them."""
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("Error: No input files", file=sys.stderr)
+        sys.exit(1)
+    bad_files = 0
+    for path in paths:
+        try:
+            data = read_save(path, use_mmap=True)
+        except ValueError as e:
+            problems = [("structure", str(e))]
+        else:
+            problems = validate_save(data)
+            release_save(data)
+        if args.fix and problems and all(k == "checksum" for k, _ in problems):
+            try:
+                data = read_save(path, use_mmap=True, writable=True)
+            except ValueError as e:
+                print(f"  {path}: can't fix: {e}")
+            else:
+                try:
+                    SaveFile(data, path=path).flush()
+                    problems = validate_save(data)
+                finally:
+                    release_save(data)
+                print(f"  {path}: checksums fixed")
+        if not problems:
+            print(f"  {path}: OK")
+            continue
+        bad_files += 1
+        print(f"  {path}: {len(problems)} problem(s)")
+        for kind, msg in problems:
+            print(f"    {kind}: {msg}")
+    if bad_files:
+        print(f"{bad_files} of {len(paths)} file(s) failed validation",
+              file=sys.stderr)
+        sys.exit(1)
 
 
-def cmd_export(args):
-    """Export all tables (or tables with data) to a directory of CSV files."""
-    data, tdb_offsets, timestamp = load_file(args.file)
-    outdir = args.output or "export"
-    os.makedirs(outdir, exist_ok=True)
+# Default address of the serve subcommand
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8642
 
-    db_indices = [args.db] if args.db is not None else range(len(tdb_offsets))
-    total_files = 0
-    use_friendly = not args.raw
+_HTTP_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 500: "Internal Server Error",
+}
 
-    for db_idx in db_indices:
-        if db_idx >= len(tdb_offsets):
-            continue
-        db = parse_tdb(data, tdb_offsets[db_idx])
-        prefix = f"db{db_idx}_" if len(tdb_offsets) > 1 else ""
 
-        for name in sorted(db["tables"]):
-            t = db["tables"][name]
-            if "error" in t or t["record_count"] == 0:
-                continue
+class QueryServer:
+    """The state behind `serve`: saves kept open (memory-mapped, headers
+    parsed), a TableCache of decoded results and equality indexes.
 
-            records = read_records(data, t)
-            fname = f"{prefix}{name}.csv"
-            fpath = os.path.join(outdir, fname)
-            with open(fpath, "w", newline="") as f:
-                records_to_csv(records, t["fields"], f,
-                               friendly_names=use_friendly, table_name=name)
-            total_files += 1
+    handle() answers one GET request target with (status, JSON-able body):
 
-    print(f"Exported {total_files} tables to {outdir}/", file=sys.stderr)
+        /                                  the loaded saves
+        /_stats                            cache and request counters
+        /<save>                            its tables
+        /<save>/<TABLE>/schema             field definitions
+        /<save>/<TABLE>?columns=&where=&offset=&limit=&db=&raw=
+                                           matching records
+        /<save>/<TABLE>/<index>?columns=   one record by index
 
+    Saves are named after their file names; names starting with "_" are
+    reserved for server endpoints, so such files aren't served. Queries
+    whose conditions are all equality tests (e.g. "PlayerId=123") are
+    answered from an index on those fields, built once per table; only the
+    matching records are decoded. Other queries go through the TableCache.
 
-def cmd_sqlite(args):
-    """Export all tables to a single SQLite database file."""
-    data, tdb_offsets, timestamp = load_file(args.file)
-    outpath = args.output or os.path.splitext(os.path.basename(args.file))[0] + ".db"
+    handle() may run in several threads at once (the HTTP front end runs
+    each request in a worker thread, so a slow cold query doesn't hold up
+    the others); the cache and the indexes are guarded by locks, and
+    decoding happens outside them.
 
-    # Remove existing file to avoid stale data
-    if os.path.exists(outpath):
-        os.remove(outpath)
+    watch() keeps the saves current (see there). With use_mmap=False the
+    saves are read into memory instead, so a file rewritten in place
+    can't pull pages out from under a loaded save.
+    """
 
-    conn = sqlite3.connect(outpath)
-    db_indices = [args.db] if args.db is not None else range(len(tdb_offsets))
-    use_friendly = not args.raw
-    total_tables = 0
+    def __init__(self, paths, cache_bytes=DECODED_CACHE_BYTES, use_mmap=True):
+        # save name -> (SaveFile, {table offset: table_digest}); replaced as
+        # a whole on reload, so a request never pairs a save with the
+        # digests of another version
+        self.saves = {}
+        self.cache = TableCache(cache_bytes)
+        self.requests = 0
+        self.reloads = 0
+        self._use_mmap = use_mmap
+        self._signatures = {}  # path -> _file_signature when last loaded
+        self._indexes = {}  # (digest, field names) -> {values: [indices]}
+        self._lock = threading.Lock()  # guards _indexes and requests
+        self._refused = set()  # paths reported as having a reserved name
+        for stem, path in self._names(paths).items():
+            self._signatures[path] = _file_signature(path)
+            save = SaveFile.open(path, use_mmap=use_mmap)
+            self.saves[stem] = (save, _table_digests(save))
 
-    # Map TDB field types to SQLite type affinities
-    sqlite_types = {
-        FIELD_STRING: "TEXT",
-        FIELD_BINARY: "TEXT",
-        FIELD_SINT: "INTEGER",
-        FIELD_UINT: "INTEGER",
-        FIELD_FLOAT: "REAL",
-    }
+    def close(self):
+        for save, _ in self.saves.values():
+            save.close()
 
-    for db_idx in db_indices:
-        if db_idx >= len(tdb_offsets):
-            continue
-        db = parse_tdb(data, tdb_offsets[db_idx])
-        prefix = f"db{db_idx}_" if len(tdb_offsets) > 1 else ""
+    def _names(self, paths):
+        """save name -> path, leaving out (and reporting once) reserved
+        names."""
+        names = {}
+        for stem, path in zip(_output_stems(paths), paths):
+            if not stem.startswith("_"):
+                names[stem] = path
+            elif path not in self._refused:
+                self._refused.add(path)
+                print(f"Not serving {path}: names starting with '_' are "
+                      f"reserved", file=sys.stderr)
+        return names
 
-        for name in sorted(db["tables"]):
-            t = db["tables"][name]
-            if "error" in t or t["record_count"] == 0:
+    def handle(self, target):
+        """Answer one request target (path and query string)."""
+        with self._lock:
+            self.requests += 1
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            if not parts:
+                return 200, {"saves": self._saves()}
+            if parts == ["_stats"]:
+                return 200, dict(self.cache.stats(), requests=self.requests,
+                                 reloads=self.reloads)
+            entry = self.saves.get(parts[0])
+            if entry is None:
+                return 404, {"error": f"No save named {parts[0]!r}"}
+            save, digests = entry
+            if len(parts) == 1:
+                return 200, self._tables(save)
+            db_idx = int(query["db"]) if "db" in query else None
+            t = save.table(parts[1], db_idx)
+            if t is None or "error" in t:
+                return 404, {"error": f"Table '{parts[1].upper()}' not found"}
+            if len(parts) == 2:
+                return 200, self._query(save, digests, t, query)
+            if len(parts) == 3 and parts[2] == "schema":
+                return 200, self._schema(t)
+            if len(parts) == 3 and parts[2].isdigit():
+                ignored = sorted({"where", "offset", "limit"} & set(query))
+                if ignored:
+                    return 400, {"error": f"{', '.join(ignored)} can't be "
+                                          f"used when fetching one record"}
+                index = int(parts[2])
+                if index >= t["record_count"]:
+                    return 404, {"error": f"{t['name']} has no record {index}"}
+                return 200, self._query(save, digests, t, query, [index])
+            return 404, {"error": f"Not found: {url.path}"}
+        except (KeyError, ValueError) as e:
+            return 400, {"error": str(e.args[0]) if e.args else str(e)}
+
+    def _saves(self):
+        return [
+            {"name": name, "path": save.path, "timestamp": save.timestamp,
+             "databases": len(save.dbs)}
+            # A list first: watch() may drop saves while this runs
+            for name, (save, _) in list(self.saves.items())
+        ]
+
+    def _tables(self, save):
+        tables = []
+        for db_idx, name, t in save.tables():
+            if "error" in t:
+                tables.append({"db": db_idx, "name": name, "error": t["error"]})
                 continue
+            tables.append({
+                "db": db_idx, "name": name, "records": t["record_count"],
+                "capacity": t["capacity"], "fields": t["field_count"],
+                "record_length": t["record_length"],
+            })
+        return {"timestamp": save.timestamp, "tables": tables}
 
-            records = read_records(data, t)
-            sorted_fields = sorted(t["fields"], key=lambda f: f["bit_offset"])
-            raw_names = [f["name"] for f in sorted_fields]
+    def _schema(self, t):
+        sorted_fields, labels = sqlite_columns(t["name"], t["fields"])
+        return {
+            "table": t["name"],
+            "records": t["record_count"],
+            "capacity": t["capacity"],
+            "record_length": t["record_length"],
+            "fields": [
+                {"name": f["name"], "label": label,
+                 "type": FIELD_TYPE_NAMES.get(f["type"], str(f["type"])),
+                 "bit_offset": f["bit_offset"], "bits": f["bits"]}
+                for f, label in zip(sorted_fields, labels)
+            ],
+        }
 
-            if use_friendly:
-                name_map = TABLE_FIELD_NAMES.get(name, FIELD_NAMES)
-                col_names = [name_map.get(n, n) for n in raw_names]
-            else:
-                col_names = list(raw_names)
+    def _load(self, path, old):
+        """Read and check a new version of a save (runs in a worker thread;
+        old is a _parsed_snapshot of the loaded version, or None).
 
-            # Deduplicate column names (SQLite identifiers are case-insensitive,
-            # so e.g. "tpst" and "tPst" collide)
-            seen = {}
-            for i, c in enumerate(col_names):
-                key = c.lower()
-                if key in seen:
-                    seen[key] += 1
-                    col_names[i] = f"{c}_{seen[key]}"
-                else:
-                    seen[key] = 0
+        Returns (save, digests). Raises ValueError for a file that fails
+        validate_save, e.g. one that is still being written.
+        """
+        data = read_save(path, use_mmap=self._use_mmap)
+        problems = validate_save(data)
+        if problems:
+            release_save(data)
+            raise ValueError(f"{len(problems)} problem(s), first: "
+                             f"{problems[0][1]}")
+        if old is None:
+            save = SaveFile(data, path=path)
+        else:
+            save = reload_save(old, data, path=path)
+        return save, _table_digests(save)
 
-            col_defs = ", ".join(
-                f'"{c}" {sqlite_types.get(sf["type"], "TEXT")}'
-                for c, sf in zip(col_names, sorted_fields)
-            )
-            table_name = f"{prefix}{name}"
-            conn.execute(f'CREATE TABLE "{table_name}" ({col_defs})')
+    def _swap(self, name, save, digests):
+        """Make save the current version of name (on the event loop)."""
+        old, old_digests = self.saves.get(name, (None, {}))
+        changed = sorted({t["name"] for _, _, t in save.tables()
+                          if "error" not in t and
+                          old_digests.get(t["table_offset"]) !=
+                          digests[t["table_offset"]]})
+        self.saves[name] = (save, digests)
+        self._drop_stale()
+        self.reloads += 1
+        if old is None:
+            print(f"Loaded {name}", file=sys.stderr)
+        else:
+            print(f"Reloaded {name}: {len(changed)} changed table(s)"
+                  + (f" ({', '.join(changed)})" if changed else ""),
+                  file=sys.stderr)
+            old.close()
 
-            placeholders = ", ".join("?" for _ in col_names)
-            conn.executemany(
-                f'INSERT INTO "{table_name}" VALUES ({placeholders})',
-                [[rec.get(n, "") for n in raw_names] for rec in records],
-            )
-            total_tables += 1
+    def _drop_stale(self):
+        """Forget cached results and indexes of tables no loaded save has."""
+        live = {d for _, digests in list(self.saves.values())
+                for d in digests.values()}
+        self.cache.retain(live)
+        with self._lock:
+            self._indexes = {key: index for key, index in self._indexes.items()
+                             if key[0] in live}
 
-    conn.commit()
-    conn.close()
-    print(f"Exported {total_tables} tables to {outpath}", file=sys.stderr)
+    async def watch(self, patterns, interval):
+        """Poll patterns every interval seconds and hot-swap changed saves.
 
+        A save whose file changed (size, mtime or inode) is read, checked
+        with validate_save and parsed in a worker thread, reusing the
+        parsed headers of unchanged tables (reload_save); requests keep
+        being answered from the loaded version meanwhile. The new version
+        then replaces it in one step. Decoded results and indexes are keyed
+        by table content, so only tables that actually changed are decoded
+        again, and those of tables no longer loaded are dropped. New files
+        matching patterns are added, vanished ones dropped; a file that
+        fails to load keeps its previous version.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            current = self._names(expand_inputs(patterns))
+            for name in [n for n in self.saves if n not in current]:
+                self.saves.pop(name)[0].close()
+                self._drop_stale()
+                print(f"Dropped {name}", file=sys.stderr)
+            for name, path in current.items():
+                try:
+                    signature = _file_signature(path)
+                except OSError:
+                    continue
+                if self._signatures.get(path) == signature:
+                    continue
+                self._signatures[path] = signature
+                old = self.saves.get(name)
+                if old is not None:
+                    old = _parsed_snapshot(old[0])
+                try:
+                    save, digests = await asyncio.to_thread(
+                        self._load, path, old)
+                except (OSError, ValueError, struct.error) as e:
+                    print(f"Not reloading {name}: {e}", file=sys.stderr)
+                    continue
+                self._swap(name, save, digests)
 
-def cmd_diff(args):
-    """Compare a table between two files and show differences."""
-    data1, offsets1, _ = load_file(args.file1)
-    data2, offsets2, _ = load_file(args.file2)
+    def _lookup(self, digest, data, t, where):
+        """Indices of the records matching equality conditions."""
+        wanted = {}
+        for name, _, value in where:
+            f = resolve_field(t, name)
+            if f is None:
+                raise KeyError(f"Unknown field in {t['name']}: {name}")
+            if f["type"] in (FIELD_STRING, FIELD_BINARY):
+                value = str(value)
+            elif not isinstance(value, (int, float)):
+                raise ValueError(f"{name} is numeric; got {value!r}")
+            if wanted.setdefault(f["name"], value) != value:
+                return []
+        names = tuple(sorted(wanted))
+        with self._lock:
+            index = self._indexes.get((digest, names))
+        if index is None:
+            index = {}
+            for i, row in enumerate(read_records(data, t, columns=names)):
+                index.setdefault(tuple([row[n] for n in names]), []).append(i)
+            with self._lock:
+                self._indexes[(digest, names)] = index
+        return index.get(tuple([wanted[n] for n in names]), [])
 
-    target = args.table.upper()
-    _, t1 = find_table_in_file(data1, offsets1, target, args.db)
-    _, t2 = find_table_in_file(data2, offsets2, target, args.db)
+    def _query(self, save, digests, t, query, indices=None):
+        columns = query["columns"].split(",") if query.get("columns") else None
+        fields = select_fields(t, columns)
+        where = parse_where(query["where"]) if query.get("where") else None
+        offset = int(query.get("offset", 0))
+        limit = int(query["limit"]) if "limit" in query else None
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset and limit must not be negative")
+        stop = offset + limit if limit is not None else None
+        digest = digests[t["table_offset"]]
 
-    if t1 is None:
-        print(f"Error: Table '{target}' not found in {args.file1}", file=sys.stderr)
-        sys.exit(1)
-    if t2 is None:
-        print(f"Error: Table '{target}' not found in {args.file2}", file=sys.stderr)
-        sys.exit(1)
+        if indices is None and where and all(op in ("=", "==")
+                                             for _, op, _ in where):
+            indices = self._lookup(digest, save.data, t, where)
+        if indices is not None:
+            decode = compile_record_decoder(fields)
+            rec_off = t["record_data_offset"]
+            rec_len = t["record_length"]
+            matched = len(indices)
+            records = [decode(save.data[rec_off + i * rec_len :
+                                        rec_off + (i + 1) * rec_len])
+                       for i in indices[offset:stop]]
+        else:
+            rows = self.cache.records(save.data, t, columns=columns,
+                                      where=where, digest=digest)
+            matched = len(rows)
+            records = rows[offset:stop]
 
-    recs1 = read_records(data1, t1)
-    recs2 = read_records(data2, t2)
+        raw = query.get("raw", "") not in ("", "0", "false")
+        sorted_fields, labels = sqlite_columns(t["name"], fields,
+                                               friendly_names=not raw)
+        raw_names = [f["name"] for f in sorted_fields]
+        return {
+            "table": t["name"],
+            "matched": matched,
+            "offset": offset,
+            "records": [dict(zip(labels, [rec[n] for n in raw_names]))
+                        for rec in records],
+        }
 
-    # Build field name list (sorted by bit_offset)
-    sorted_fields = sorted(t1["fields"], key=lambda f: f["bit_offset"])
-    field_names = [f["name"] for f in sorted_fields]
 
-    # Determine a key for matching records. Use string fields if available,
-    # otherwise fall back to record index.
-    string_fields = [f["name"] for f in sorted_fields if f["type"] == FIELD_STRING]
+def _file_signature(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _table_digests(save):
+    """table offset -> table_digest for every table of a save."""
+    return {t["table_offset"]: table_digest(save.data, t)
+            for _, _, t in save.tables() if "error" not in t}
+
+
+def _json_safe(value):
+    """value with NaN and +/-inf floats replaced by None, which JSON can
+    represent (float fields such as STAD's can hold them)."""
+    if isinstance(value, float):
+        return value if value - value == 0 else None
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    return value
+
+
+def _json_payload(body):
+    try:
+        text = json.dumps(body, separators=(",", ":"), allow_nan=False)
+    except ValueError:
+        text = json.dumps(_json_safe(body), separators=(",", ":"),
+                          allow_nan=False)
+    return text.encode()
+
+
+def _respond(server, target):
+    """server.handle(target) with the body encoded, as (status, payload).
+    Run in a worker thread: decoding a cold table, building an index or
+    encoding a large result would otherwise stall every other connection.
+    """
+    try:
+        status, body = server.handle(target)
+    except Exception as e:
+        print(f"Error handling {target}: {e!r}", file=sys.stderr)
+        status, body = 500, {"error": str(e)}
+    return status, _json_payload(body)
 
-    def record_key(rec):
-        if string_fields:
-            return tuple(str(rec.get(f, "")) for f in string_fields)
-        return None
 
-    # Try key-based matching first
-    use_keys = string_fields and len({record_key(r) for r in recs1}) == len(recs1)
-
-    if use_keys:
-        map2 = {}
-        for r in recs2:
-            map2[record_key(r)] = r
-
-        added = []
-        removed = []
-        changed = []
-
-        keys1 = set()
-        for r1 in recs1:
-            k = record_key(r1)
-            keys1.add(k)
-            r2 = map2.get(k)
-            if r2 is None:
-                removed.append(r1)
+async def _serve_http(server, reader, writer):
+    """Answer the GET requests on one HTTP/1.x connection (keep-alive)."""
+    try:
+        while True:
+            request = await reader.readline()
+            if not request.strip():
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip().lower()
+            if "content-length" in headers:
+                await reader.readexactly(int(headers["content-length"]))
+
+            parts = request.decode("latin-1").split()
+            version = parts[2] if len(parts) == 3 else "HTTP/1.0"
+            connection = headers.get("connection", "")
+            keep_alive = connection == "keep-alive" or (
+                version == "HTTP/1.1" and connection != "close")
+            if len(parts) != 3:
+                status = 400
+                payload = _json_payload({"error": "Malformed request line"})
+                keep_alive = False
+            elif parts[0] != "GET":
+                status = 405
+                payload = _json_payload(
+                    {"error": f"Method {parts[0]} not allowed"})
             else:
-                diffs = {}
-                for fn in field_names:
-                    v1, v2 = r1.get(fn), r2.get(fn)
-                    if str(v1) != str(v2):
-                        diffs[fn] = (v1, v2)
-                if diffs:
-                    changed.append((r1, diffs))
-
-        for r2 in recs2:
-            if record_key(r2) not in keys1:
-                added.append(r2)
+                status, payload = await asyncio.to_thread(_respond, server,
+                                                          parts[1])
+            writer.write(
+                f"HTTP/1.1 {status} {_HTTP_REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                f"\r\n".encode() + payload
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _run_server(server, host, port, socket_path, watch=None,
+                      patterns=()):
+    def handler(reader, writer):
+        return _serve_http(server, reader, writer)
+
+    if watch:
+        watcher = asyncio.create_task(server.watch(patterns, watch))
+
+    if socket_path:
+        listener = await asyncio.start_unix_server(handler, path=socket_path)
+        where = socket_path
     else:
-        # Index-based matching
-        added = []
-        removed = []
-        changed = []
-        max_len = max(len(recs1), len(recs2))
-        for i in range(max_len):
-            if i >= len(recs1):
-                added.append(recs2[i])
-            elif i >= len(recs2):
-                removed.append(recs1[i])
-            else:
-                diffs = {}
-                for fn in field_names:
-                    v1, v2 = recs1[i].get(fn), recs2[i].get(fn)
-                    if str(v1) != str(v2):
-                        diffs[fn] = (v1, v2)
-                if diffs:
-                    changed.append((recs1[i], diffs))
-
-    # Print summary
-    print(f"Diff: {target} ({len(recs1)} vs {len(recs2)} records)")
-    print(f"  Changed: {len(changed)}, Added: {len(added)}, Removed: {len(removed)}")
+        listener = await asyncio.start_server(handler, host, port)
+        where = f"http://{host}:{port}/"
+    print(f"Serving {len(server.saves)} save(s) on {where}", file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        if watch:
+            watcher.cancel()
 
-    if not changed and not added and not removed:
-        print("  No differences found.")
-        return
 
-    # Print changes
-    # Build a label for each record using string fields
-    def rec_label(rec):
-        parts = []
-        for sf in string_fields:
-            v = rec.get(sf, "")
-            if v:
-                parts.append(str(v))
-        return " | ".join(parts) if parts else f"(record)"
+def cmd_serve(args):
+    """Keep saves loaded and answer JSON queries over HTTP."""
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("Error: No input files", file=sys.stderr)
+        sys.exit(1)
+    server = QueryServer(paths, cache_bytes=args.cache_mb * 1024 * 1024,
+                         use_mmap=not args.watch)
+    try:
+        asyncio.run(_run_server(server, args.host, args.port, args.socket,
+                                watch=args.watch, patterns=args.inputs))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        server.close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
 
-    name_map = TABLE_FIELD_NAMES.get(target, FIELD_NAMES)
-    for rec, diffs in changed:
-        label = rec_label(rec)
-        print(f"\n  ~ {label}")
-        for fn, (v1, v2) in sorted(diffs.items()):
-            fn_display = name_map.get(fn, fn)
-            print(f"      {fn_display}: {v1} -> {v2}")
 
-    for rec in added:
-        print(f"\n  + {rec_label(rec)}")
+def _add_query_arguments(parser):
+    parser.add_argument(
+        "--columns",
+        help="Comma-separated fields to output (raw codes or friendly names)",
+    )
+    parser.add_argument(
+        "--where",
+        help='Only output matching records, e.g. "TeamId=17 AND Overall>=80"',
+    )
 
-    for rec in removed:
-        print(f"\n  - {rec_label(rec)}")
+
+def _add_jobs_argument(parser):
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="Decode tables in N worker processes (default: 1)",
+    )
 
 
 def main():
     # Detect subcommand mode vs default mode
-    if len(sys.argv) > 1 and sys.argv[1] in ("export", "sqlite", "diff"):
+    if len(sys.argv) > 1 and sys.argv[1] in ("export", "sqlite", "diff",
+                                             "batch", "history", "import",
+                                             "update", "validate", "serve"):
         mode = sys.argv[1]
         if mode == "export":
             parser = argparse.ArgumentParser(
@@ -854,6 +4348,8 @@ def main():
             parser.add_argument(
                 "--raw", action="store_true", help="Use raw field codes"
             )
+            _add_query_arguments(parser)
+            _add_jobs_argument(parser)
             args = parser.parse_args(sys.argv[2:])
             cmd_export(args)
         elif mode == "sqlite":
@@ -869,6 +4365,17 @@ def main():
             parser.add_argument(
                 "--raw", action="store_true", help="Use raw field codes"
             )
+            parser.add_argument(
+                "--incremental", action="store_true",
+                help="Update an existing export, re-importing only tables "
+                     "whose data changed",
+            )
+            parser.add_argument(
+                "--no-indexes", action="store_true",
+                help="Don't index key columns (player/team/coach IDs, ...)",
+            )
+            _add_query_arguments(parser)
+            _add_jobs_argument(parser)
             args = parser.parse_args(sys.argv[2:])
             cmd_sqlite(args)
         elif mode == "diff":
@@ -878,10 +4385,179 @@ def main():
             )
             parser.add_argument("file1", help="First save file")
             parser.add_argument("file2", help="Second save file")
-            parser.add_argument("table", help="Table name to compare")
+            parser.add_argument(
+                "table", nargs="?", help="Table name to compare"
+            )
+            parser.add_argument(
+                "--all", action="store_true", help="Compare every table"
+            )
+            parser.add_argument(
+                "--summary", action="store_true",
+                help="Only list which tables changed and how many records "
+                     "differ (byte-level, every table unless one is named)",
+            )
             parser.add_argument("--db", type=int, default=None, help="TDB index")
             args = parser.parse_args(sys.argv[2:])
             cmd_diff(args)
+        elif mode == "batch":
+            parser = argparse.ArgumentParser(
+                prog="tdb_parser.py batch",
+                description="Export many save files in parallel",
+            )
+            parser.add_argument(
+                "inputs", nargs="+",
+                help="Save files, directories or glob patterns",
+            )
+            parser.add_argument(
+                "-o", "--output", help="Output directory (default: batch)"
+            )
+            parser.add_argument(
+                "-f", "--format", choices=BATCH_FORMATS, default="csv",
+                help="Output format (default: csv)",
+            )
+            parser.add_argument(
+                "--merge", action="store_true",
+                help="Write one output per table with a SourceFile column "
+                     "instead of one output per file",
+            )
+            parser.add_argument(
+                "-j", "--jobs", type=int, default=None,
+                help="Worker processes (default: CPU count)",
+            )
+            parser.add_argument(
+                "--validate", action="store_true",
+                help="Check each file's structure and checksums first and "
+                     "skip files that fail",
+            )
+            parser.add_argument(
+                "--tables", help="Comma-separated tables to export (default: all)"
+            )
+            parser.add_argument("--db", type=int, default=None, help="TDB index")
+            parser.add_argument(
+                "--raw", action="store_true", help="Use raw field codes"
+            )
+            _add_query_arguments(parser)
+            args = parser.parse_args(sys.argv[2:])
+            cmd_batch(args)
+        elif mode == "history":
+            parser = argparse.ArgumentParser(
+                prog="tdb_parser.py history",
+                description="Append save snapshots to a SQLite history store",
+            )
+            parser.add_argument("store", help="History .db file")
+            parser.add_argument(
+                "inputs", nargs="+",
+                help="Save files, directories or glob patterns",
+            )
+            parser.add_argument(
+                "--tables", help="Comma-separated tables to store (default: all)"
+            )
+            parser.add_argument("--db", type=int, default=None, help="TDB index")
+            parser.add_argument(
+                "--raw", action="store_true", help="Use raw field codes"
+            )
+            args = parser.parse_args(sys.argv[2:])
+            cmd_history(args)
+        elif mode == "import":
+            parser = argparse.ArgumentParser(
+                prog="tdb_parser.py import",
+                description="Apply a CSV of changes to a table in place",
+            )
+            parser.add_argument("file", help="Save file to patch")
+            parser.add_argument("table", help="Table name (e.g. PLAY)")
+            parser.add_argument(
+                "csv",
+                help="CSV with key column(s) plus the fields to set; empty "
+                     "cells are left unchanged",
+            )
+            parser.add_argument(
+                "--key",
+                help="Comma-separated key fields that locate records "
+                     "(default: the table's ID columns)",
+            )
+            parser.add_argument(
+                "-o", "--output",
+                help="Write a patched copy here instead of editing the file",
+            )
+            parser.add_argument("--db", type=int, default=None, help="TDB index")
+            args = parser.parse_args(sys.argv[2:])
+            cmd_import(args)
+        elif mode == "update":
+            parser = argparse.ArgumentParser(
+                prog="tdb_parser.py update",
+                description="Bulk-update fields across matching records",
+            )
+            parser.add_argument("file", help="Save file to patch")
+            parser.add_argument("table", help="Table name (e.g. PLAY)")
+            parser.add_argument(
+                "--set", required=True,
+                help='Assignments, e.g. "Overall += 3, Speed = 90"',
+            )
+            parser.add_argument(
+                "--where",
+                help='Only update matching records, e.g. "TeamId == 17"',
+            )
+            parser.add_argument(
+                "--clamp", action="store_true",
+                help="Clamp results to each field's range instead of failing",
+            )
+            parser.add_argument(
+                "-o", "--output",
+                help="Write a patched copy here instead of editing the file",
+            )
+            parser.add_argument("--db", type=int, default=None, help="TDB index")
+            args = parser.parse_args(sys.argv[2:])
+            cmd_update(args)
+        elif mode == "validate":
+            parser = argparse.ArgumentParser(
+                prog="tdb_parser.py validate",
+                description="Check save files' structure and checksums",
+            )
+            parser.add_argument(
+                "inputs", nargs="+",
+                help="Save files, directories or glob patterns",
+            )
+            parser.add_argument(
+                "--fix", action="store_true",
+                help="Recompute checksums in files whose only problems are "
+                     "checksum mismatches",
+            )
+            args = parser.parse_args(sys.argv[2:])
+            cmd_validate(args)
+        elif mode == "serve":
+            parser = argparse.ArgumentParser(
+                prog="tdb_parser.py serve",
+                description="Keep saves loaded and answer JSON queries "
+                            "over HTTP",
+            )
+            parser.add_argument(
+                "inputs", nargs="+",
+                help="Save files, directories or glob patterns",
+            )
+            parser.add_argument(
+                "--host", default=SERVE_HOST,
+                help=f"Address to listen on (default: {SERVE_HOST})",
+            )
+            parser.add_argument(
+                "--port", type=int, default=SERVE_PORT,
+                help=f"Port to listen on (default: {SERVE_PORT})",
+            )
+            parser.add_argument(
+                "--socket", help="Listen on this Unix socket instead"
+            )
+            parser.add_argument(
+                "--cache-mb", type=int,
+                default=DECODED_CACHE_BYTES // (1024 * 1024),
+                help="Memory budget for decoded tables, in MB "
+                     "(default: %(default)s)",
+            )
+            parser.add_argument(
+                "--watch", type=float, metavar="SECONDS",
+                help="Check the inputs every SECONDS and hot-swap changed, "
+                     "new or removed saves",
+            )
+            args = parser.parse_args(sys.argv[2:])
+            cmd_serve(args)
     else:
         parser = argparse.ArgumentParser(
             description="EA TDB Save File Parser for NCAA Football"
@@ -903,6 +4579,12 @@ def main():
             "--raw", action="store_true",
             help="Use raw TDB field codes instead of friendly names",
         )
+        parser.add_argument(
+            "--cache-dir", default=os.environ.get(SCHEMA_CACHE_ENV),
+            help="Cache parsed table headers here, keyed by a hash of the "
+                 f"header bytes (default: ${SCHEMA_CACHE_ENV})",
+        )
+        _add_query_arguments(parser)
         args = parser.parse_args()
 
         if args.table:
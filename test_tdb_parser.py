@@ -0,0 +1,406 @@
+"""Tests for tdb_parser against the sample saves in extracted/ and full_saves/.
+
+Run with: python -m pytest -q
+"""
+
+import asyncio
+import csv
+import io
+import os
+import sqlite3
+import struct
+from collections import OrderedDict
+
+import pytest
+
+import tdb_parser as tp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EXTRACTED = os.path.join(HERE, "extracted")
+SAMPLES = sorted(
+    os.path.join(EXTRACTED, name) for name in os.listdir(EXTRACTED)
+    if name.endswith("_file")
+)
+AFQB = os.path.join(EXTRACTED, "ROSTER-AFQB_file")
+AFQB2 = os.path.join(EXTRACTED, "ROSTER-AFQB2_file")
+WASHST = os.path.join(EXTRACTED, "ROSTER-ROSTER_WASHST_15_file")
+CPUTEAM = os.path.join(EXTRACTED, "ROSTER-ROSTER_CPUTEAM_15_file")
+
+
+def load(path):
+    """A SaveFile over a mutable in-memory copy of path."""
+    with open(path, "rb") as f:
+        return tp.SaveFile(bytearray(f.read()), path=path)
+
+
+def _same(a, b):
+    return a == b or (a != a and b != b)
+
+
+def test_compiled_decoder_matches_decode_field():
+    save = load(AFQB)
+    for _, name, t in save.tables():
+        decode = tp.compile_record_decoder(t["fields"])
+        rec_off, rec_len = t["record_data_offset"], t["record_length"]
+        for i in range(0, t["record_count"], max(1, t["record_count"] // 20)):
+            start = rec_off + i * rec_len
+            raw = save.data[start : start + rec_len]
+            expected = {f["name"]: tp.decode_field(raw, f)
+                        for f in t["fields"]}
+            row = decode(raw)
+            assert row.keys() == expected.keys(), name
+            assert all(_same(row[k], v) for k, v in expected.items()), name
+
+
+def test_read_columns_matches_read_records():
+    save = load(AFQB)
+    for _, name, t in save.tables():
+        records = tp.read_records(save.data, t)
+        cols = tp.read_columns(save.data, t)
+        for code, col in cols.items():
+            assert len(col) == len(records), name
+            assert all(_same(rec[code], v)
+                       for rec, v in zip(records, col.tolist())), (name, code)
+
+
+def test_close_with_lazy_views_alive():
+    with tp.SaveFile.open(AFQB, use_mmap=True) as save:
+        records = save.records("PLAY", lazy=True)
+    # The views outlive close(); the map goes once they are collected
+    assert records[0]["DIGP"] == load(AFQB).records("PLAY")[0]["DIGP"]
+
+
+def test_parse_where_keeps_and_inside_quotes():
+    assert tp.parse_where('Name="A AND B" and TeamId=17') == [
+        ("Name", "==", "A AND B"), ("TeamId", "==", 17)]
+
+
+def _dump_sqlite(path):
+    conn = sqlite3.connect(path)
+    try:
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "ORDER BY name")]
+        tables = {name: conn.execute(f'SELECT * FROM "{name}"').fetchall()
+                  for name in names}
+        # Bookkeeping rows are replaced in place, so their order varies
+        tables[tp.SQLITE_SYNC_TABLE].sort()
+        indexes = sorted(row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"))
+    finally:
+        conn.close()
+    return tables, indexes
+
+
+@pytest.mark.parametrize("indexes", [True, False])
+def test_incremental_sqlite_matches_fresh_export(tmp_path, indexes):
+    fresh = str(tmp_path / "fresh.db")
+    synced = str(tmp_path / "synced.db")
+    tp.export_sqlite(load(AFQB2), fresh)
+    # Start from an older save, possibly exported without indexes
+    tp.export_sqlite(load(AFQB), synced, indexes=indexes)
+    tp.export_sqlite(load(AFQB2), synced, incremental=True)
+    assert _dump_sqlite(synced) == _dump_sqlite(fresh)
+
+
+def test_diff_matches_play_on_its_key():
+    a, b = load(AFQB), load(AFQB2)
+    result = tp.diff_tables(a.data, a.table("PLAY"), b.data, b.table("PLAY"),
+                            "PLAY")
+    assert result["key"] == ("DIGP",)
+    assert len(result["changed"]) == 6
+    assert not result["added"] and not result["removed"]
+
+
+def test_diff_keys_match_reordered_records():
+    # Same depth charts, stored in a different order
+    a, b = load(AFQB), load(WASHST)
+    result = tp.diff_tables(a.data, a.table("DCHT"), b.data, b.table("DCHT"),
+                            "DCHT")
+    assert not result["identical"]
+    assert result["key"] == tuple(tp.DIFF_KEYS["DCHT"][0])
+    assert not (result["changed"] or result["added"] or result["removed"])
+
+
+def test_diff_falls_back_to_index_when_key_is_not_unique():
+    a, b = load(AFQB), load(AFQB)
+    t = b.table("PLAY")
+    digp = b.records("PLAY")[0]["DIGP"]
+    b.write_records("PLAY", [(1, {"DIGP": digp})])
+    result = tp.diff_tables(a.data, a.table("PLAY"), b.data, t, "PLAY")
+    assert result["key"] is None
+    assert len(result["changed"]) == 1
+
+
+def test_identical_tables_are_not_decoded():
+    a, b = load(AFQB), load(AFQB2)
+    result = tp.diff_tables(a.data, a.table("TEAM"), b.data, b.table("TEAM"),
+                            "TEAM")
+    assert result["identical"]
+
+
+@pytest.mark.parametrize("table", ["PLAY", "TEAM", "COCH", "STAD"])
+def test_encode_decode_round_trip(table):
+    save = load(AFQB)
+    t = save.table(table)
+    rec_off, rec_len = t["record_data_offset"], t["record_length"]
+    for i in range(0, t["record_count"], max(1, t["record_count"] // 40)):
+        original = bytes(save.data[rec_off + i * rec_len :
+                                   rec_off + (i + 1) * rec_len])
+        rebuilt = bytearray(original)
+        blank = bytearray(rec_len)
+        for f in t["fields"]:
+            value = tp.decode_field(original, f)
+            if isinstance(value, str) and "\ufffd" in value:
+                # Non-ASCII bytes decode lossily (e.g. a stadium name with
+                # a (R) sign); leave those strings as they are
+                continue
+            tp.encode_field(rebuilt, f, value)
+            tp.encode_field(blank, f, value)
+            decoded = tp.decode_field(blank, f)
+            assert decoded == value or (decoded != decoded and value != value)
+        # Re-encoding every decoded value changes no bits
+        assert bytes(rebuilt) == original
+
+
+def test_encode_rejects_values_that_dont_fit():
+    save = load(AFQB)
+    f = tp.resolve_field(save.table("PLAY"), "Overall")
+    with pytest.raises(ValueError):
+        tp.field_payload(f, 1 << f["bits"])
+    with pytest.raises(ValueError):
+        tp.field_payload(f, -1)
+
+
+def test_write_records_round_trip():
+    save = load(AFQB)
+    save.write_records("PLAY", {3: {"Overall": 99, "RTSP": 12}}.items())
+    rec = save.records("PLAY")[3]
+    assert rec["RVOP"] == 99 and rec["RTSP"] == 12
+
+
+def test_import_updates_by_key():
+    save = load(AFQB)
+    t = save.table("PLAY")
+    rows = [{"DIGP": "71", "Overall": "99"}]
+    updates = tp.import_updates(save.data, t, rows)
+    index = [rec["DIGP"] for rec in save.records("PLAY")].index(71)
+    assert updates == [(index, {"RVOP": 99})]
+
+
+@pytest.mark.parametrize("text", ["DIGP,Overall\n70\n", "Overall,DIGP\n70\n",
+                                  "DIGP,Overall\n70,99,5\n"])
+def test_import_rejects_ragged_rows(text):
+    save = load(AFQB)
+    rows = list(csv.DictReader(io.StringIO(text)))
+    with pytest.raises(ValueError, match="line 2"):
+        tp.import_updates(save.data, save.table("PLAY"), rows)
+
+
+def test_update_rejects_division_by_zero():
+    save = load(AFQB)
+    before = bytes(save.data)
+    with pytest.raises(ValueError, match="Overall"):
+        save.update_columns("PLAY", "Overall /= 0", clamp=True)
+    assert bytes(save.data) == before
+
+
+def test_update_rejects_operands_beyond_int64():
+    save = load(AFQB)
+    before = bytes(save.data)
+    with pytest.raises(ValueError, match="out of range"):
+        save.update_columns("PLAY", "Overall += 300000000000000000000")
+    # In range, but the product overflows int64: clamped, not wrapped
+    save.update_columns("PLAY", f"Overall *= {1 << 62}", clamp=True)
+    assert {rec["RVOP"] for rec in save.records("PLAY")} <= {0, 127}
+    assert bytes(save.data) != before
+
+
+@pytest.mark.parametrize("path", SAMPLES, ids=os.path.basename)
+def test_stored_checksums_match_tdb_crc(path):
+    save = load(path)
+    checked = 0
+    for db in save.dbs:
+        for label, crc_off, start, end in tp.tdb_checksums(db):
+            stored = struct.unpack_from(">I", save.data, crc_off)[0]
+            assert tp.tdb_crc(save.data[start:end]) == stored, label
+            checked += 1
+    assert checked > 0
+
+
+def test_tdb_crc_is_crc32_mpeg2():
+    # Standard check value of CRC-32/MPEG-2
+    assert tp.tdb_crc(b"123456789") == 0x0376E6E7
+
+
+def test_append_then_delete_restores_file():
+    with open(AFQB, "rb") as f:
+        original = f.read()
+    save = load(AFQB)
+    t = save.table("PLAY")
+    count = t["record_count"]
+    new = [dict(rec) for rec in save.records("PLAY")[:2]]
+    assert save.append_records("PLAY", new) == count
+    assert t["record_count"] == count + 2
+    assert [dict(r) for r in save.records("PLAY")[-2:]] == new
+    assert save.delete_records("PLAY", [count, count + 1]) == 2
+    for db in save.dbs:
+        tp.update_checksums(save.data, db)
+    assert bytes(save.data) == original
+
+
+def test_append_respects_tables_without_record_storage():
+    # INJY reports a capacity of 501 here but stores no slots (alloc 0x1a)
+    save = load(CPUTEAM)
+    t = save.table("INJY")
+    assert t["capacity"] > 0 and tp.allocated_slots(t) == 0
+    before = bytes(save.data)
+    with pytest.raises(ValueError):
+        save.append_records("INJY", [{}])
+    assert bytes(save.data) == before
+
+
+@pytest.mark.parametrize("path", SAMPLES, ids=os.path.basename)
+def test_samples_validate(path):
+    assert tp.validate_save(load(path).data) == []
+
+
+def test_corrupted_byte_is_reported_and_fixed():
+    save = load(AFQB)
+    t = save.table("PLAY")
+    save.data[t["record_data_offset"]] ^= 0xFF
+    problems = tp.validate_save(save.data)
+    assert problems and all(kind == "checksum" for kind, _ in problems)
+    for db in save.dbs:
+        tp.update_checksums(save.data, db)
+    assert tp.validate_save(save.data) == []
+
+
+def test_stfs_package_yields_the_extracted_save():
+    data = tp.read_save(os.path.join(HERE, "full_saves", "ROSTER-AFQB"))
+    with open(AFQB, "rb") as f:
+        assert data == f.read()
+
+
+@pytest.mark.parametrize("gap", [b"", bytes(64), b"junk DB\x00\x08 junk"],
+                         ids=["adjacent", "padded", "junk"])
+def test_find_tdbs_follows_db_size(gap):
+    data = load(AFQB).data
+    tdb = data[56 : 56 + tp._db_size(data, 56)]
+    buf = bytes(tdb + gap + tdb + bytes(16))
+    assert tp.find_tdbs(buf) == ([0, len(tdb) + len(gap)], None)
+    assert tp.find_tdbs(buf, scan=True) == tp.find_tdbs(buf)
+
+
+def test_schema_cache_hit_and_invalidation(tmp_path, monkeypatch):
+    path = str(tmp_path / "save")
+    load(AFQB).flush(path)
+    cache_dir = str(tmp_path / "cache")
+    with tp.SaveFile.open(path, cache_dir=cache_dir) as save:
+        count = save.table("PLAY")["record_count"]
+        first = save.records("PLAY")[0]
+
+    # Unchanged file: no TDB search or header parsing at all
+    with monkeypatch.context() as m:
+        for name in ("find_tdbs", "parse_tdb", "parse_table"):
+            m.setattr(tp, name, None)
+        with tp.SaveFile.open(path, cache_dir=cache_dir) as save:
+            assert save.table("PLAY")["record_count"] == count
+            assert save.records("PLAY")[0] == first
+
+    edited = load(path)
+    edited.append_records("PLAY", [first])
+    edited.flush(path)
+    with tp.SaveFile.open(path, cache_dir=cache_dir) as save:
+        assert save.table("PLAY")["record_count"] == count + 1
+        assert save.records("PLAY")[-1] == first
+
+
+def test_table_cache_lru():
+    save = load(AFQB)
+    team, stad, coch = (save.table(n) for n in ("TEAM", "STAD", "COCH"))
+    sizes = {}
+    for t in (team, stad, coch):
+        probe = tp.TableCache()
+        probe.records(save.data, t)
+        sizes[t["name"]] = probe.size
+
+    cache = tp.TableCache(max(sizes["TEAM"] + sizes["STAD"],
+                              sizes["TEAM"] + sizes["COCH"]))
+    records = cache.records(save.data, team)
+    cache.records(save.data, stad)
+    assert cache.records(save.data, team) is records
+    # COCH pushes out STAD, the least recently used
+    cache.records(save.data, coch)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+    assert stats["entries"] == 2 and stats["bytes"] <= stats["max_bytes"]
+    assert cache.records(save.data, team) is records
+    cache.records(save.data, stad)
+    assert cache.stats()["misses"] == 4
+
+    tiny = tp.TableCache(max_bytes=1)
+    assert tiny.records(save.data, team) == records
+    assert tiny.stats()["entries"] == 0
+
+
+def test_query_server_routes():
+    server = tp.QueryServer([AFQB])
+    try:
+        name = os.path.basename(AFQB)
+        assert server.handle("/_stats")[0] == 200
+        status, body = server.handle(
+            f"/{name}/PLAY?where=DIGP=71&columns=DIGP")
+        assert status == 200 and body["records"] == [{"DIGP": 71}]
+        assert server.handle(f"/{name}/PLAY/0?where=DIGP=5")[0] == 400
+        assert server.handle(f"/{name}/PLAY?offset=-1")[0] == 400
+        assert server.handle(f"/{name}/PLAY?limit=-1")[0] == 400
+    finally:
+        server.close()
+    assert tp._json_payload({"v": float("nan"), "w": [float("inf")]}) == \
+        b'{"v":null,"w":[null]}'
+
+
+def test_decoder_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(tp, "DECODER_CACHE_SIZE", 2)
+    monkeypatch.setattr(tp, "_DECODER_CACHE", OrderedDict())
+    save = load(AFQB)
+    play, team, stad = (save.table(n)["fields"]
+                        for n in ("PLAY", "TEAM", "STAD"))
+    decode = tp.compile_record_decoder(play)
+    tp.compile_record_decoder(team)
+    assert tp.compile_record_decoder(play) is decode
+    tp.compile_record_decoder(stad)
+    # TEAM was the least recently used
+    assert len(tp._DECODER_CACHE) == 2
+    assert tp._schema_key(team) not in tp._DECODER_CACHE
+
+
+def test_reload_save_reuses_unchanged_headers():
+    old = load(AFQB)
+    team, play = old.table("TEAM"), old.table("PLAY")
+    edited = load(AFQB)
+    edited.append_records("PLAY", [dict(old.records("PLAY")[0])])
+    new = tp.reload_save(old, edited.data)
+    assert new.table("TEAM") is team
+    assert new.table("PLAY") is not play
+    assert new.table("PLAY")["record_count"] == play["record_count"] + 1
+    assert old.table("PLAY")["record_count"] == play["record_count"]
+
+
+def test_watch_swaps_in_a_changed_save(tmp_path):
+    path = str(tmp_path / "save")
+    load(AFQB).flush(path)
+    server = tp.QueryServer([path], use_mmap=False)
+    try:
+        target = "/save/PLAY?where=DIGP=71&columns=DIGP"
+        assert server.handle(target)[1]["matched"] == 1
+        edited = load(path)
+        edited.append_records("PLAY", [{"DIGP": 71}])
+        edited.flush(path)
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(server.watch([path], 0.01), 0.5))
+        assert server.reloads == 1
+        assert server.handle(target)[1]["matched"] == 2
+    finally:
+        server.close()